@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+import aiosqlite
+
+from database import run_migrations
+
+SCHEMA_PATH = f"{os.path.realpath(os.path.dirname(__file__))}/../database/schema.sql"
+
+
+async def create_database(directory: str) -> str:
+    """
+    Create a migrated database file the way DiscordBot.init_db() does.
+
+    :param directory: The directory to create the database in.
+    :return: The path to the database.
+    """
+    path = f"{directory}/database.db"
+    async with aiosqlite.connect(path) as db:
+        with open(SCHEMA_PATH) as file:
+            await db.executescript(file.read())
+        await db.commit()
+        await run_migrations(db)
+    return path
+
+
+def temporary_directory() -> tempfile.TemporaryDirectory:
+    # fsync is close to free on a tmpfs, BENCHMARK_DIR points the benchmarks at a directory on a real disk
+    return tempfile.TemporaryDirectory(prefix="bench-", dir=os.environ.get("BENCHMARK_DIR"))
@@ -0,0 +1,75 @@
+"""
+Compares the write throughput of committing every write on its own with the group commits of DatabaseManager, for
+concurrent writers and for a single writer waiting on each of its writes.
+
+Run with `python -m benchmarks.commit_batching`.
+"""
+import asyncio
+import time
+
+from benchmarks import create_database, temporary_directory
+from database import DatabaseManager
+
+WRITERS = 20
+WRITES_PER_WRITER = 50
+
+
+def count_commits(database: DatabaseManager) -> list:
+    commits = [0]
+    commit = database.connection.commit
+
+    async def counted_commit():
+        commits[0] += 1
+        await commit()
+
+    database.connection.commit = counted_commit
+    return commits
+
+
+async def unbatched_writer(database: DatabaseManager, writer: int) -> None:
+    for i in range(WRITES_PER_WRITER):
+        await database.connection.execute(
+            "INSERT INTO players (player_id, team_name, role) VALUES (?, ?, ?)",
+            (writer * WRITES_PER_WRITER + i, f"Alternate Team {writer}", "Player")
+        )
+        await database.connection.commit()
+
+
+async def batched_writer(database: DatabaseManager, writer: int) -> None:
+    for i in range(WRITES_PER_WRITER):
+        await database.add_player(writer * WRITES_PER_WRITER + i, f"Alternate Team {writer}", "Player")
+
+
+async def transaction_writer(database: DatabaseManager, writer: int) -> None:
+    async with database.transaction():
+        for i in range(WRITES_PER_WRITER):
+            await database.add_player(writer * WRITES_PER_WRITER + i, f"Alternate Team {writer}", "Player")
+
+
+async def measure(name: str, writer, writers: int = WRITERS) -> None:
+    with temporary_directory() as directory:
+        database = await DatabaseManager.connect(await create_database(directory), readers=0)
+        commits = count_commits(database)
+        started_at = time.perf_counter()
+        await asyncio.gather(*(writer(database, i) for i in range(writers)))
+        elapsed = time.perf_counter() - started_at
+        await database.close()
+
+    writes = writers * WRITES_PER_WRITER
+    print(f"{name:<24} {writes:>7} {commits[0]:>8} {writes / elapsed:>10.0f} {commits[0] / elapsed:>10.0f}"
+          f" {elapsed * 1000:>9.1f}")
+
+
+async def main() -> None:
+    print(f"{WRITERS} concurrent writers, {WRITES_PER_WRITER} writes each")
+    print(f"{'mode':<24} {'writes':>7} {'commits':>8} {'writes/s':>10} {'commits/s':>10} {'total ms':>9}")
+    await measure("commit per write", unbatched_writer)
+    await measure("group commits", batched_writer)
+    await measure("transaction() blocks", transaction_writer)
+    print(f"1 writer, {WRITES_PER_WRITER} writes")
+    await measure("commit per write", unbatched_writer, writers=1)
+    await measure("group commits", batched_writer, writers=1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Measures the per-message cost of deciding which handlers a message reaches, with the checks inlined in on_message
+and the coaching listener as before, against MessageRouter.
+
+The handlers do nothing, so only the routing is measured. The messages are a mix of chat in ordinary channels, with
+the odd Tenor link and coaching trigger, and a few quotes. "inline checks" leaves out the coaching listener, "inline +
+listener" also pays for the task discord.py creates to run it.
+
+Run with `python -m benchmarks.message_routing`.
+"""
+import asyncio
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from helpers.router import MessageRouter
+
+MESSAGES = 100_000
+RATE = 1000
+QUOTES_CHANNEL_ID = 1053462751240003594
+QUOTE_PATTERN = r'^[\"\‘\’\“\”\«\»]\s*(.+?)\s*[\"\‘\’\“\”\«\»]\s*-?\s*@?([\w\s@#<>]+)$'
+COACHING_TRIGGER = "LEGO® Batman™: The Videogame"
+
+
+async def handler(message) -> None:
+    return None
+
+
+async def coaching_listener(message) -> None:
+    if COACHING_TRIGGER in message.content:
+        await handler(message)
+
+
+async def inline(message) -> None:
+    # The checks of on_message before the router
+    if message.channel.id == QUOTES_CHANNEL_ID:
+        if re.match(QUOTE_PATTERN, message.content):
+            await handler(message)
+    if "tenor.com/view/" in message.content:
+        await handler(message)
+
+
+async def listeners(message) -> None:
+    # discord.py runs every on_message listener of a cog in a task of its own
+    asyncio.create_task(coaching_listener(message))
+    await inline(message)
+
+
+def build_messages() -> list:
+    random.seed(0)
+    words = "the quick brown fox jumps over the lazy dog scrim tonight who is playing tank support dps".split()
+    messages = []
+    for _ in range(MESSAGES):
+        content = " ".join(random.choices(words, k=random.randint(3, 30)))
+        channel_id = random.randint(1, 50)
+        roll = random.random()
+        if roll < 0.02:
+            content += " https://tenor.com/view/happy-dance-gif-123"
+        elif roll < 0.021:
+            content = f"{COACHING_TRIGGER} coach @player Team"
+        elif roll < 0.03:
+            channel_id = QUOTES_CHANNEL_ID
+            content = f'"{content}" - @someone'
+        messages.append(SimpleNamespace(content=content, channel=SimpleNamespace(id=channel_id)))
+    return messages
+
+
+async def measure(name: str, route, messages: list) -> None:
+    started_at = time.perf_counter()
+    for i, message in enumerate(messages):
+        await route(message)
+        if i % RATE == 0:
+            # Let the scheduled listener tasks run, as the event loop does between gateway events
+            await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    per_message = (time.perf_counter() - started_at) / len(messages)
+    print(f"{name:<20} {per_message * 1e6:>12.2f} {per_message * RATE * 100:>18.3f}")
+
+
+async def main() -> None:
+    router = MessageRouter()
+    router.add_channel(QUOTES_CHANNEL_ID, handler)
+    router.add_trigger("tenor.com/view/", handler)
+    router.add_trigger(COACHING_TRIGGER, handler)
+    messages = build_messages()
+
+    print(f"{MESSAGES} messages")
+    print(f"{'mode':<20} {'us / message':>12} {f'% CPU at {RATE}/s':>18}")
+    for _ in range(2):
+        await measure("inline checks", inline, messages)
+        await measure("inline + listener", listeners, messages)
+        await measure("MessageRouter", router.route, messages)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Measures how long a roster takes to publish to 1, 5 and 20 mirrored messages, editing them one after the other with a
+fetch first, as fetch_and_update used to, against the concurrent edits of RosterPublisher.
+
+Discord is replaced by a local aiohttp server answering every request after LATENCY seconds, which also checks that
+no channel ever sees two edits at once.
+
+Run with `python -m benchmarks.roster_publish`.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import aiohttp
+import discord
+from aiohttp import web
+
+from helpers.publisher import RosterPublisher
+
+LATENCY = 0.05
+MIRRORS = (1, 5, 20)
+CHANNELS = 8
+
+
+class FakeDiscord:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.in_flight: dict[str, int] = {}
+        self.max_in_flight_per_channel = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        self.requests += 1
+        self.in_flight[channel_id] = self.in_flight.get(channel_id, 0) + 1
+        self.max_in_flight_per_channel = max(self.max_in_flight_per_channel, self.in_flight[channel_id])
+        try:
+            await asyncio.sleep(LATENCY)
+        finally:
+            self.in_flight[channel_id] -= 1
+        return web.json_response({"id": request.match_info["message_id"]})
+
+
+class FakeMessage:
+    def __init__(self, session: aiohttp.ClientSession, url: str, channel_id: int, message_id: int) -> None:
+        self.session = session
+        self.url = f"{url}/channels/{channel_id}/messages/{message_id}"
+
+    async def edit(self, embeds: list[discord.Embed]) -> None:
+        async with self.session.patch(self.url, json={"embeds": [embed.to_dict() for embed in embeds]}) as response:
+            response.raise_for_status()
+
+
+class FakeChannel:
+    def __init__(self, session: aiohttp.ClientSession, url: str, channel_id: int) -> None:
+        self.session = session
+        self.url = url
+        self.id = channel_id
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return FakeMessage(self.session, self.url, self.id, message_id)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        async with self.session.get(f"{self.url}/channels/{self.id}/messages/{message_id}") as response:
+            response.raise_for_status()
+        return self.get_partial_message(message_id)
+
+
+async def sequential(bot, messages: list, embeds: list[discord.Embed]) -> None:
+    for message_id, channel_id in messages:
+        channel = bot.get_channel(channel_id)
+        message = await channel.fetch_message(message_id)
+        await message.edit(embeds=embeds)
+
+
+async def main() -> None:
+    fake = FakeDiscord()
+    app = web.Application()
+    app.router.add_route("*", "/channels/{channel_id}/messages/{message_id}", fake.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    print(f"{LATENCY * 1000:.0f}ms per request, mirrors spread over up to {CHANNELS} channels")
+    print(f"{'mirrors':>7} {'sequential ms':>14} {'requests':>9} {'publisher ms':>13} {'requests':>9}"
+          f" {'max edits per channel':>22}")
+    async with aiohttp.ClientSession() as session:
+        channels = {channel_id: FakeChannel(session, url, channel_id) for channel_id in range(1, CHANNELS + 1)}
+        for mirrors in MIRRORS:
+            messages = [(1000 + i, i % CHANNELS + 1) for i in range(mirrors)]
+            database = SimpleNamespace()
+
+            async def get_roster_messages(roster_key):
+                return messages
+
+            database.get_roster_messages = get_roster_messages
+            bot = SimpleNamespace(database=database, get_channel=channels.get)
+
+            embeds = [discord.Embed(title="Alternate Test", description=f"Roster {mirrors}")]
+            fake.requests = 0
+            started_at = time.perf_counter()
+            await sequential(bot, messages, embeds)
+            sequential_time = time.perf_counter() - started_at
+            sequential_requests = fake.requests
+
+            publisher = RosterPublisher(bot, max_concurrency=5)
+            fake.requests = 0
+            fake.max_in_flight_per_channel = 0
+            started_at = time.perf_counter()
+            await publisher.publish("Alternate Test", embeds)
+            publisher_time = time.perf_counter() - started_at
+
+            print(f"{mirrors:>7} {sequential_time * 1000:>14.1f} {sequential_requests:>9} "
+                  f"{publisher_time * 1000:>13.1f} {fake.requests:>9} {fake.max_in_flight_per_channel:>22}")
+
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
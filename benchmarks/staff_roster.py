@@ -0,0 +1,68 @@
+"""
+Compares fetching the teams of 200 managers one query per manager, as the staff roster used to, with the single
+query of DatabaseManager.get_managed_teams_by_manager().
+
+Run with `python -m benchmarks.staff_roster`.
+"""
+import asyncio
+import time
+
+from benchmarks import create_database, temporary_directory
+from database import DatabaseManager
+
+MANAGERS = 200
+TEAMS = 60
+ROUNDS = 20
+
+
+async def trace(database: DatabaseManager) -> list:
+    statements = []
+    for connection in [database.connection, *database.readers]:
+        await connection.set_trace_callback(statements.append)
+    return statements
+
+
+async def per_manager(database: DatabaseManager, manager_ids: list) -> dict:
+    return {manager_id: await database.get_managed_teams(manager_id) for manager_id in manager_ids}
+
+
+async def bulk(database: DatabaseManager, manager_ids: list) -> dict:
+    return await database.get_managed_teams_by_manager()
+
+
+async def measure(name: str, database: DatabaseManager, manager_ids: list, fetch) -> dict:
+    statements = await trace(database)
+    started_at = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = await fetch(database, manager_ids)
+    elapsed = (time.perf_counter() - started_at) / ROUNDS
+    queries = sum(1 for statement in statements if statement.lstrip().upper().startswith("SELECT")) / ROUNDS
+    print(f"{name:<20} {queries:>8.0f} {elapsed * 1000:>10.2f}")
+    return result
+
+
+async def main() -> None:
+    with temporary_directory() as directory:
+        database = await DatabaseManager.connect(await create_database(directory))
+        manager_ids = list(range(1, MANAGERS + 1))
+        async with database.transaction():
+            for team in range(TEAMS):
+                await database.create_team(f"Alternate Team {team}", "#114b5f", "banner.png")
+                for player in range(8):
+                    await database.add_player(10_000 + team * 8 + player, f"Alternate Team {team}", "Player")
+            # Some managers run a few teams, the others manage none
+            for manager_id in manager_ids[:TEAMS]:
+                for team in range(manager_id % 3 + 1):
+                    await database.add_player(manager_id, f"Alternate Team {(manager_id + team) % TEAMS}", "Manager")
+
+        print(f"{MANAGERS} managers, {TEAMS} teams, mean of {ROUNDS} staff roster refreshes")
+        print(f"{'mode':<20} {'queries':>8} {'latency ms':>10}")
+        before = await measure("query per manager", database, manager_ids, per_manager)
+        after = await measure("one bulk query", database, manager_ids, bulk)
+        assert {manager_id: sorted(teams) for manager_id, teams in before.items() if teams} == \
+               {manager_id: sorted(teams) for manager_id, teams in after.items()}
+        await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
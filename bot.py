@@ -8,21 +8,31 @@ Version: 6.1.0
 import asyncio
 import json
 import logging
+import logging.handlers
 import os
 import platform
+import queue
 import random
 import re
-from collections import deque
-from datetime import datetime
+import time
 
+import aiohttp
 import aiosqlite
 import discord
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
 from dotenv import load_dotenv
 
-from database import DatabaseManager
+from database import DatabaseManager, run_migrations
 from helpers import methods
+from helpers.metrics import BotMetrics
+from helpers.publisher import RosterPublisher
+from helpers.ratelimit import SlidingWindowLimiter
+from helpers.refresher import RosterRefresher
+from helpers.router import MessageRouter
+from helpers.twitter import ALT_ESPORTS_PROFILE_IMAGE_URL, TimelinePoller, TwitterClient, get_high_res_profile_image_url
+from helpers.watchdog import LoopWatchdog
+from helpers.webhooks import WebhookQueue
 
 config = methods.load_config()
 
@@ -31,6 +41,9 @@ intents.members = True
 intents.message_content = True
 intents.presences = True
 
+QUOTES_CHANNEL_ID = 1053462751240003594
+QUOTE_PATTERN = re.compile(r'^[\"\‘\’\“\”\«\»]\s*(.+?)\s*[\"\‘\’\“\”\«\»]\s*-?\s*@?([\w\s@#<>]+)$')
+
 
 # Setup both of the loggers
 class LoggingFormatter(logging.Formatter):
@@ -53,15 +66,30 @@ class LoggingFormatter(logging.Formatter):
         logging.CRITICAL: red + bold,
     }
 
+    def __init__(self) -> None:
+        super().__init__()
+        # Build the formatter of every level once instead of for every record
+        self.formatters = {}
+        for level, log_color in self.COLORS.items():
+            format = "(black){asctime}(reset) (levelcolor){levelname:<8}(reset) (green){name}(reset) {message}"
+            format = format.replace("(black)", self.black + self.bold)
+            format = format.replace("(reset)", self.reset)
+            format = format.replace("(levelcolor)", log_color)
+            format = format.replace("(green)", self.green + self.bold)
+            self.formatters[level] = logging.Formatter(format, "%Y-%m-%d %H:%M:%S", style="{")
+
+    def format(self, record):
+        return self.formatters[record.levelno].format(record)
+
+
+class JsonFormatter(logging.Formatter):
     def format(self, record):
-        log_color = self.COLORS[record.levelno]
-        format = "(black){asctime}(reset) (levelcolor){levelname:<8}(reset) (green){name}(reset) {message}"
-        format = format.replace("(black)", self.black + self.bold)
-        format = format.replace("(reset)", self.reset)
-        format = format.replace("(levelcolor)", log_color)
-        format = format.replace("(green)", self.green + self.bold)
-        formatter = logging.Formatter(format, "%Y-%m-%d %H:%M:%S", style="{")
-        return formatter.format(record)
+        return json.dumps({
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }, ensure_ascii=False)
 
 
 logger = logging.getLogger("discord_bot")
@@ -70,16 +98,26 @@ logger.setLevel(logging.INFO)
 # Console handler
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(LoggingFormatter())
-# File handler
-file_handler = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
-file_handler_formatter = logging.Formatter(
-    "[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"
+# File handler, rotated once it reaches the configured size
+file_handler = logging.handlers.RotatingFileHandler(
+    filename="discord.log",
+    encoding="utf-8",
+    maxBytes=config["logging"]["max_bytes"],
+    backupCount=config["logging"]["backup_count"],
 )
+if config["logging"]["json"]:
+    file_handler_formatter = JsonFormatter()
+else:
+    file_handler_formatter = logging.Formatter(
+        "[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"
+    )
 file_handler.setFormatter(file_handler_formatter)
 
-# Add the handlers
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# Records are only queued on the event loop, the handlers write them from the listener's thread
+log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+log_listener.start()
 
 
 class DiscordBot(commands.Bot):
@@ -100,8 +138,25 @@ class DiscordBot(commands.Bot):
         self.logger = logger
         self.config = config
         self.database = None
-        self.tenor_spam_cache = {}
-        self.spam_triggered_time = {}
+        self.session = None
+        self.twitter = None
+        self.webhook_queue = None
+        self.timeline_poller = None
+        self.metrics = BotMetrics()
+        self.watchdog = LoopWatchdog(config["watchdog"]["interval"], config["watchdog"]["threshold"])
+        self.roster_publisher = RosterPublisher(self, max_concurrency=config["roster_publish_concurrency"])
+        self.roster_refresher = RosterRefresher(self, debounce=config["roster_refresh_debounce"])
+        self.channel_gif_limiter = SlidingWindowLimiter(
+            config["gif_spam"]["channel_limit"], config["gif_spam"]["channel_window"], config["gif_spam"]["cooldown"]
+        )
+        self.user_gif_limiter = SlidingWindowLimiter(
+            config["gif_spam"]["user_limit"], config["gif_spam"]["user_window"], config["gif_spam"]["cooldown"]
+        )
+        self._pending_deletes: dict[int, set[int]] = {}
+        self._delete_tasks = set()
+        self.router = MessageRouter()
+        self.router.add_channel(QUOTES_CHANNEL_ID, self.check_quote)
+        self.router.add_trigger("tenor.com/view/", self.check_tenor_spam)
 
         # Load the excluded channel IDs from the JSON file into a set
         config_path = f"{os.path.realpath(os.path.dirname(__file__))}/configs/excluded_channels.json"
@@ -117,6 +172,8 @@ class DiscordBot(commands.Bot):
             ) as file:
                 await db.executescript(file.read())
             await db.commit()
+            version = await run_migrations(db)
+            self.logger.info(f"Database schema is at version {version}")
 
     async def load_cogs(self) -> None:
         """
@@ -160,15 +217,55 @@ class DiscordBot(commands.Bot):
             f"Running on: {platform.system()} {platform.release()} ({os.name})"
         )
         self.logger.info("-------------------")
+        self.watchdog.start()
         await self.init_db()
-        await self.load_cogs()
-        self.status_task.start()
-        self.database = DatabaseManager(
-            connection=await aiosqlite.connect(
-                f"{os.path.realpath(os.path.dirname(__file__))}/database/database.db"
-            )
+        self.database = await DatabaseManager.connect(
+            f"{os.path.realpath(os.path.dirname(__file__))}/database/database.db",
+            readers=config["database_readers"],
         )
+        self.metrics.instrument_database(self.database)
         methods.set_database(self.database)
+        imported = await self.database.import_message_info(
+            f"{os.path.realpath(os.path.dirname(__file__))}/configs/message_info.json"
+        )
+        if imported:
+            self.logger.info(f"Imported {imported} roster messages from message_info.json")
+        # The legacy file does not record expiry times, so its invites are kept for the full invite lifetime
+        imported = await self.database.import_tryout_invites(
+            f"{os.path.realpath(os.path.dirname(__file__))}/configs/tryout_invites.json",
+            expires_at=time.time() + 604800,
+        )
+        if imported:
+            self.logger.info(f"Imported {imported} tryout invites from tryout_invites.json")
+        # One pooled session for every HTTP request the bot makes outside of discord.py
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30, connect=10),
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+        )
+        self.twitter = TwitterClient(self.session)
+        self.webhook_queue = WebhookQueue(
+            self.session,
+            self.database,
+            os.getenv("TWITTER_WEBHOOK"),
+            avatar_url=get_high_res_profile_image_url(ALT_ESPORTS_PROFILE_IMAGE_URL),
+        )
+        self.webhook_queue.start()
+        self.timeline_poller = TimelinePoller(
+            self.twitter,
+            self.webhook_queue,
+            self.database,
+            config["twitter_poller"]["accounts"],
+            base_url=config["twitter_poller"]["base_url"],
+            min_interval=config["twitter_poller"]["min_interval"],
+            max_interval=config["twitter_poller"]["max_interval"],
+            max_failures=config["twitter_poller"]["max_failures"],
+        )
+        self.timeline_poller.start()
+        await self.load_cogs()
+        self.status_task.start()
+        self.metrics.instrument_http(self.http)
+        if config["metrics"]["enabled"]:
+            await self.metrics.start(config["metrics"]["host"], config["metrics"]["port"])
         if config["sync_commands_globally"]:
             self.logger.info("Syncing commands globally...")
             await bot.tree.sync()
@@ -181,6 +278,25 @@ class DiscordBot(commands.Bot):
             bot.cached_command_ids[cmd.name] = cmd.id
         self.logger.info("Cached command IDs")
 
+    async def close(self) -> None:
+        """
+        This will be executed when the bot shuts down, the background workers and database connections are closed
+        once the gateway is disconnected.
+        """
+        await super().close()
+        await self.roster_refresher.close()
+        if self.timeline_poller is not None:
+            await self.timeline_poller.close()
+        if self.webhook_queue is not None:
+            await self.webhook_queue.close()
+        if self.session is not None:
+            await self.session.close()
+        if self.database is not None:
+            await self.database.close()
+        await self.metrics.close()
+        await self.watchdog.close()
+        log_listener.stop()
+
     async def on_message(self, message: discord.Message) -> None:
         """
         The code in this event is executed every time someone sends a message, with or without the prefix
@@ -190,57 +306,103 @@ class DiscordBot(commands.Bot):
         if message.author == self.user or message.author.bot:
             return
 
-        # Check if the message is in the channel with the ID 1053462751240003594
-        if message.channel.id == 1053462751240003594:
-            pattern = r'^[\"\‘\’\“\”\«\»]\s*(.+?)\s*[\"\‘\’\“\”\«\»]\s*-?\s*@?([\w\s@#<>]+)$'  # pattern = r'^"\s*(.+?)\s*"\s*-?\s*@?([\w\s@#<>]+)$'
-            match = re.match(pattern, message.content)
-            if match:
-                quote_text = match.group(1)
-                thread = await message.create_thread(
-                    name=quote_text
-                )
-                await thread.send(f'Quote thread for: "{quote_text}"')
-            else:
-                await message.channel.send(f'{message.author.mention}, only quotes are allowed here.', delete_after=5)
-                await message.delete()
-
-        if message.channel.id not in self.excluded_channels:
-            # Initialize the cache for the channel if it doesn't exist
-            self.tenor_spam_cache.setdefault(message.channel.id, deque(maxlen=3))
-            self.spam_triggered_time.setdefault(message.channel.id, None)
-
-            # Current time in UTC
-            now = datetime.utcnow()
-
-            # Check if the message contains a Tenor link
-            if "tenor.com/view/" in message.content:
-                # If spam was previously triggered, delete all Tenor links for 10 seconds
-                if self.spam_triggered_time.get(message.channel.id):
-                    if (now - self.spam_triggered_time.get(message.channel.id)).total_seconds() <= 15:
-                        await message.delete()
-                        return
-
-                # Add the message and its timestamp to the cache
-                self.tenor_spam_cache[message.channel.id].append((message, now))
-
-                # Check if the last 3 messages were sent within 10 seconds
-                if len(self.tenor_spam_cache[message.channel.id]) == 3:
-                    oldest_time = self.tenor_spam_cache[message.channel.id][0][1]
-                    newest_time = self.tenor_spam_cache[message.channel.id][-1][1]
-
-                    if (newest_time - oldest_time).total_seconds() <= 10:
-                        await message.delete()  # Delete the third GIF
-                        self.spam_triggered_time[message.channel.id] = now
-                        await message.channel.send("No GIF spamming, please!", delete_after=16)
+        if await self.router.route(message):
+            return
 
         await self.process_commands(message)
 
+    async def check_quote(self, message: discord.Message) -> None:
+        """
+        Only allow quotes in the quotes channel, each quote gets its own thread.
+
+        :param message: The message that was sent in the quotes channel.
+        """
+        match = QUOTE_PATTERN.match(message.content)
+        if match:
+            quote_text = match.group(1)
+            thread = await message.create_thread(
+                name=quote_text
+            )
+            await thread.send(f'Quote thread for: "{quote_text}"')
+        else:
+            await message.channel.send(f'{message.author.mention}, only quotes are allowed here.', delete_after=5)
+            await message.delete()
+
+    async def check_tenor_spam(self, message: discord.Message) -> bool:
+        """
+        Delete Tenor links sent too often in the same channel or by the same user, the thresholds are set in the config.
+
+        :param message: The message containing a Tenor link.
+        :return: True if the message is deleted.
+        """
+        if message.guild is None or message.channel.id in self.excluded_channels:
+            return False
+
+        # Messages are tracked with their channel, a user's spam can span several channels
+        item = (message.channel.id, message.id)
+        channel_tripped, channel_spam = self.channel_gif_limiter.hit(message.channel.id, item)
+        user_tripped, user_spam = self.user_gif_limiter.hit(message.author.id, item)
+        spam = set(channel_spam).union(user_spam)
+        if not spam:
+            return False
+
+        self.delete_later(spam)
+        if channel_tripped or user_tripped:
+            await message.channel.send("No GIF spamming, please!", delete_after=16)
+        return item in spam
+
+    def delete_later(self, messages) -> None:
+        """
+        Queue messages for deletion, the messages queued for a channel within a second are deleted in bulk.
+
+        :param messages: The channel ID and message ID of every message to delete.
+        """
+        for channel_id, message_id in messages:
+            pending = self._pending_deletes.get(channel_id)
+            if pending is None:
+                pending = self._pending_deletes[channel_id] = set()
+                task = asyncio.create_task(self._flush_deletes(channel_id))
+                self._delete_tasks.add(task)
+                task.add_done_callback(self._delete_tasks.discard)
+            pending.add(message_id)
+
+    async def _flush_deletes(self, channel_id: int) -> None:
+        await asyncio.sleep(1)
+        message_ids = list(self._pending_deletes.pop(channel_id))
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            self.logger.warning(f"Could not delete {len(message_ids)} spam message(s), channel {channel_id} not found")
+            return
+        # Bulk deletes take at most 100 messages
+        for i in range(0, len(message_ids), 100):
+            batch = [discord.Object(id=message_id) for message_id in message_ids[i:i + 100]]
+            try:
+                await channel.delete_messages(batch)
+            except discord.HTTPException as e:
+                self.logger.warning(f"Could not bulk delete spam messages in {channel}, deleting them one by one: {e}")
+                for message in batch:
+                    try:
+                        await channel.get_partial_message(message.id).delete()
+                    except discord.NotFound:
+                        pass
+                    except discord.HTTPException as e:
+                        self.logger.warning(f"Could not delete spam message {message.id} in {channel}: {e}")
+
+    async def on_command(self, context: Context) -> None:
+        """
+        The code in this event is executed every time a normal command is invoked.
+
+        :param context: The context of the command that is invoked.
+        """
+        self.metrics.command_started(context)
+
     async def on_command_completion(self, context: Context) -> None:
         """
         The code in this event is executed every time a normal command has been *successfully* executed.
 
         :param context: The context of the command that has been executed.
         """
+        self.metrics.command_finished(context)
         full_command_name = context.command.qualified_name
         split = full_command_name.split(" ")
         executed_command = str(split[0])
@@ -274,6 +436,7 @@ class DiscordBot(commands.Bot):
         :param context: The context of the normal command that failed executing.
         :param error: The error that has been faced.
         """
+        self.metrics.command_finished(context, error)
         if isinstance(error, commands.CommandOnCooldown):
             minutes, seconds = divmod(error.retry_after, 60)
             hours, minutes = divmod(minutes, 60)
@@ -29,27 +29,31 @@ class Coaching(commands.Cog, name="coaching"):
     def __init__(self, bot) -> None:
         self.bot = bot
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        # Prevent the bot from responding to its own messages
-        if message.author == self.bot.user:
-            return
+    async def cog_load(self) -> None:
+        self.bot.router.add_trigger("LEGO® Batman™: The Videogame", self.on_trigger)
 
-        # Check if the message is "LEGO® Batman™: The Videogame"
-        if "LEGO® Batman™: The Videogame" in message.content:
-            args = message.content.split(maxsplit=4)  # Split the message into parts
+    async def cog_unload(self) -> None:
+        self.bot.router.remove_trigger(self.on_trigger)
 
-            if len(args) >= 4 and message.mentions:
-                team_name = args[3]  # The team name should follow the command
-                member = message.mentions[0]  # Get the first mentioned user as the member
+    async def on_trigger(self, message: discord.Message) -> None:
+        """
+        Creates a coaching thread from a message containing "LEGO® Batman™: The Videogame".
 
-                # Create a mock context object
-                mock_ctx = MockContext(message)
+        :param message: The message that contains the trigger phrase.
+        """
+        args = message.content.split(maxsplit=4)  # Split the message into parts
 
-                # Call the create method with the mock context and other arguments
-                await self.create(mock_ctx, member, team_name)
-            else:
-                await message.channel.send("Usage: LEGO® Batman™: The Videogame {team} @member")
+        if len(args) >= 4 and message.mentions:
+            team_name = args[3]  # The team name should follow the command
+            member = message.mentions[0]  # Get the first mentioned user as the member
+
+            # Create a mock context object
+            mock_ctx = MockContext(message)
+
+            # Call the create method with the mock context and other arguments
+            await self.create(mock_ctx, member, team_name)
+        else:
+            await message.channel.send("Usage: LEGO® Batman™: The Videogame {team} @member")
 
     async def thread_exists(self, context: Context, member: discord.Member) -> bool:
         target_thread_name = f"{member.name} 1 on 1 coaching"
@@ -97,14 +101,15 @@ class Coaching(commands.Cog, name="coaching"):
         channel = context.channel
 
         if team is None:
-            if await methods.team_affiliation(context.author) == "Team does not exist.":
+            affiliation = await methods.team_affiliation(context.author)
+            if affiliation == "Team does not exist.":
                 embed = discord.Embed(
                     title=f"Team {team} doesn't exist.",
                     color=0xE02B2B,
                 )
                 await context.send(embed=embed, ephemeral=True)
                 return
-            elif await methods.team_affiliation(context.author) == "Sorry, you need to specify your team.":
+            elif affiliation == "Sorry, you need to specify your team.":
                 embed = discord.Embed(
                     title="Please specify your team.",
                     description="You are affiliated with multiple teams.",
@@ -113,15 +118,17 @@ class Coaching(commands.Cog, name="coaching"):
                 await context.send(embed=embed, ephemeral=True)
                 return
             else:
-                team = await methods.team_affiliation(context.author)
+                team = affiliation
         else:
             team = methods.standardize_team_name(team)
 
         player_roles = ['Main Tank', 'Off Tank', 'Hitscan DPS', 'Flex DPS', 'Main Support', 'Flex Support',
                         'Substitute']
-        team_members = await self.bot.database.get_players(team)
-        coaches_and_managers = [m for m in team_members if m[2] in ['Head Coach', 'Assistant Coach', 'Manager']]
-        players = [m for m in team_members if m[2] in player_roles]
+        roster = await self.bot.database.get_roster(team)
+        players_by_role = roster.players_by_role if roster else {}
+        coaches_and_managers = [m for role in ['Head Coach', 'Assistant Coach', 'Manager']
+                                for m in players_by_role.get(role, ())]
+        players = [m for role in player_roles for m in players_by_role.get(role, ())]
         if member is None:
             for player in players:  # Now iterating over players list
                 member_id = player[0]  # Assuming player_id is at index 0
@@ -6,13 +6,23 @@ Description:
 Version: 6.1.0
 """
 
+import asyncio
 import random
+from collections import deque
 
 import aiohttp
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
 
+from helpers import methods
+
+config = methods.load_config()
+
+FACTS_URL = "https://uselessfacts.jsph.pl/random.json?language=en"
+# The number of facts fetched ahead of the command
+FACT_BUFFER_SIZE = 10
+
 
 class Choice(discord.ui.View):
     def __init__(self) -> None:
@@ -100,6 +110,46 @@ class Fun(commands.Cog, name="fun"):
 
     def __init__(self, bot) -> None:
         self.bot = bot
+        self.facts = deque(maxlen=FACT_BUFFER_SIZE)
+        self.served_facts = deque(maxlen=50)
+        self._refill_task = None
+
+    async def cog_load(self) -> None:
+        self.refill_facts()
+
+    async def cog_unload(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+
+    def refill_facts(self) -> None:
+        """
+        Fill the fact buffer in the background, unless it is already being filled.
+        """
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        while len(self.facts) < FACT_BUFFER_SIZE:
+            fact = await self.fetch_fact()
+            if fact is None:
+                return  # The API is unavailable, the next command tries again
+            self.facts.append(fact)
+
+    async def fetch_fact(self, timeout: float = 5) -> str | None:
+        """
+        Fetch a random fact over the bot's shared session.
+
+        :param timeout: The number of seconds to wait for the API.
+        :return: The fact, or None if the API failed or was too slow.
+        """
+        try:
+            async with self.bot.session.get(FACTS_URL, timeout=aiohttp.ClientTimeout(total=timeout)) as request:
+                if request.status == 200:
+                    data = await request.json()
+                    return data["text"]
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError):
+            pass
+        return None
 
     @commands.hybrid_command(name="randomfact", description="Get a random fact.")
     async def randomfact(self, context: Context) -> None:
@@ -108,22 +158,28 @@ class Fun(commands.Cog, name="fun"):
 
         :param context: The hybrid command context.
         """
-        # This will prevent your bot from stopping everything when doing a web request - see:
-        # https://discordpy.readthedocs.io/en/stable/faq.html#how-do-i-make-a-web-request
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                    "https://uselessfacts.jsph.pl/random.json?language=en"
-            ) as request:
-                if request.status == 200:
-                    data = await request.json()
-                    embed = discord.Embed(description=data["text"], color=0xD75BF4)
-                else:
-                    embed = discord.Embed(
-                        title="Error!",
-                        description="There is something wrong with the API, please try again later",
-                        color=discord.Color.from_str(config["error_color"]),
-                    )
-                await context.send(embed=embed)
+        # Facts are served from the buffer, only an empty buffer waits on the API, briefly
+        if self.facts:
+            fact = self.facts.popleft()
+        else:
+            fact = await self.fetch_fact(timeout=2)
+        self.refill_facts()
+
+        if fact is not None:
+            self.served_facts.append(fact)
+        elif self.served_facts:
+            # The API is down or slow, repeat a fact rather than failing
+            fact = random.choice(self.served_facts)
+
+        if fact is not None:
+            embed = discord.Embed(description=fact, color=0xD75BF4)
+        else:
+            embed = discord.Embed(
+                title="Error!",
+                description="There is something wrong with the API, please try again later",
+                color=discord.Color.from_str(config["error_color"]),
+            )
+        await context.send(embed=embed)
 
     @commands.hybrid_command(
         name="coinflip", description="Make a coin flip, but give your bet before."
@@ -5,17 +5,21 @@ Description:
 
 Version: 6.1.0
 """
-import os
+import json
+import time
 from datetime import datetime
 
 import discord
 from discord import app_commands
+from discord.app_commands import Choice
 from discord.ext import commands
 from discord.ext.commands import Context
 import logging
 
+from helpers.archive import FORMATS, ArchiveWriter, attachment_manifest
 from helpers.methods import load_config
-from helpers.twitter import twitter
+from helpers.purge import Purger
+from helpers.twitter import build_tweet_message
 
 config = load_config()
 
@@ -287,24 +291,79 @@ class Management(commands.Cog, name="management"):
         description="Delete a number of messages.",
     )
     @commands.has_guild_permissions(manage_messages=True)
-    @commands.bot_has_permissions(manage_messages=True)
-    @app_commands.describe(amount="The amount of messages that should be deleted.")
-    async def purge(self, context: Context, amount: int) -> None:
+    @commands.bot_has_permissions(manage_messages=True, read_message_history=True)
+    @app_commands.describe(
+        amount="The amount of messages that should be deleted.",
+        author="Only delete the messages of this user.",
+        contains="Only delete the messages containing this text.",
+        has_attachment="Only delete the messages with, or without, attachments.",
+        before="Only delete the messages sent before the message with this ID.",
+        after="Only delete the messages sent after the message with this ID.",
+    )
+    async def purge(self, context: Context, amount: int, author: discord.User = None, contains: str = None,
+                    has_attachment: bool = None, before: str = None, after: str = None) -> None:
         """
         Delete a number of messages.
 
+        Messages younger than 14 days are deleted in bulk, older messages are deleted one by one at a pace that stays
+        under the rate limit, and the progress is shown while the purge runs.
+
         :param context: The hybrid command context.
         :param amount: The number of messages that should be deleted.
+        :param author: The user whose messages should be deleted. Default is everyone.
+        :param contains: The text the deleted messages should contain.
+        :param has_attachment: Whether the deleted messages should have attachments. Default is either.
+        :param before: The ID of the message the deleted messages were sent before. Default is this command.
+        :param after: The ID of the message the deleted messages were sent after.
         """
-        await context.send(
+        try:
+            before = discord.Object(id=int(before)) if before else context.message
+            after = discord.Object(id=int(after)) if after else None
+        except ValueError:
+            embed = discord.Embed(
+                description="The before and after options should be message IDs.",
+                color=discord.Color.from_str(config["error_color"]),
+            )
+            await context.send(embed=embed)
+            return
+
+        progress = await context.send(
             "Deleting messages..."
         )  # Bit of a hacky way to make sure the bot responds to the interaction and doens't get a "Unknown Interaction" response
-        purged_messages = await context.channel.purge(limit=amount + 1)
+
+        async def on_progress(purger: Purger) -> None:
+            await progress.edit(
+                content=f"Deleting messages... {purger.deleted} of {amount} deleted, {purger.scanned} scanned "
+                        f"({purger.throughput:.1f} messages/s)"
+            )
+
+        purger = Purger(
+            context.channel,
+            amount,
+            author=author,
+            contains=contains,
+            has_attachment=has_attachment,
+            before=before,
+            after=after,
+            max_scanned=max(amount, config["purge_max_scanned"]),
+            old_delay=config["purge_old_delete_delay"],
+            on_progress=on_progress,
+        )
+        deleted = await purger.run()
         embed = discord.Embed(
-            description=f"**{context.author}** cleared **{len(purged_messages) - 1}** messages!",
+            description=f"**{context.author}** cleared **{deleted}** messages!",
             color=discord.Color.from_str(config["main_color"]),
         )
-        await context.channel.send(embed=embed)
+        embed.set_footer(
+            text=f"{purger.scanned} messages scanned in {purger.elapsed:.1f}s ({purger.throughput:.1f} messages/s)"
+                 + (f", {purger.failed} could not be deleted" if purger.failed else "")
+                 + (", stopped at the scan limit" if purger.scanned >= purger.max_scanned and deleted < amount else "")
+        )
+        try:
+            await progress.edit(content=None, embed=embed)
+        except discord.HTTPException:
+            # The interaction token of a slash command expires after 15 minutes, long purges report in the channel
+            await context.channel.send(embed=embed)
 
     @commands.hybrid_command(
         name="hackban",
@@ -346,41 +405,94 @@ class Management(commands.Cog, name="management"):
 
     @commands.hybrid_command(
         name="archive",
-        description="Archives in a text file the last messages with a chosen limit of messages.",
+        description="Archives in a file the last messages with a chosen limit of messages.",
     )
     @commands.has_permissions(manage_messages=True)
     @app_commands.describe(
         limit="The limit of messages that should be archived.",
+        format="The format of the archive.",
     )
-    async def archive(self, context: Context, limit: int = 10) -> None:
+    @app_commands.choices(format=[Choice(name="Text", value="text"),
+                                  Choice(name="JSON Lines", value="jsonl"),
+                                  Choice(name="HTML", value="html")])
+    async def archive(self, context: Context, limit: int = 10, format: str = "text") -> None:
         """
-        Archives in a text file the last messages with a chosen limit of messages. This command requires the MESSAGE_CONTENT intent to work properly.
+        Archives in a file the last messages with a chosen limit of messages. This command requires the MESSAGE_CONTENT intent to work properly.
+
+        The archive is gzip compressed while the history is read and split in parts that fit the upload limit of the
+        guild, each part is uploaded as soon as it is full. The attachments of the archived messages are listed in a
+        separate JSON Lines manifest.
 
         :param context: The hybrid command context.
         :param limit: The limit of messages that should be archived. Default is 10.
+        :param format: The format of the archive, text, jsonl or html. Default is text.
         """
-        log_file = f"{context.channel.id}.log"
-        with open(log_file, "w", encoding="UTF-8") as f:
-            f.write(
-                f'Archived messages from: #{context.channel} ({context.channel.id}) in the guild "{context.guild}" ({context.guild.id}) at {datetime.now().strftime("%d.%m.%Y %H:%M:%S")}\n'
+        archive_format = FORMATS.get(format)
+        if archive_format is None:
+            embed = discord.Embed(
+                description=f"Unknown archive format, choose one of: {', '.join(FORMATS)}.",
+                color=discord.Color.from_str(config["error_color"]),
             )
-            async for message in context.channel.history(
-                    limit=limit, before=context.message
-            ):
-                attachments = []
-                for attachment in message.attachments:
-                    attachments.append(attachment.url)
-                attachments_text = (
-                    f"[Attached File{'s' if len(attachments) >= 2 else ''}: {', '.join(attachments)}]"
-                    if len(attachments) >= 1
-                    else ""
-                )
-                f.write(
-                    f"{message.created_at.strftime('%d.%m.%Y %H:%M:%S')} {message.author} {message.id}: {message.clean_content} {attachments_text}\n"
-                )
-        f = discord.File(log_file)
-        await context.send(file=f)
-        os.remove(log_file)
+            await context.send(embed=embed)
+            return
+
+        started_at = time.monotonic()
+        progress = await context.send(f"Archiving the last {limit} messages...")
+        title = f'Archived messages from: #{context.channel} ({context.channel.id}) in the guild "{context.guild}" ({context.guild.id}) at {datetime.now().strftime("%d.%m.%Y %H:%M:%S")}'
+        writer = ArchiveWriter(
+            str(context.channel.id),
+            archive_format.extension,
+            context.guild.filesize_limit,
+            header=archive_format.header(context.channel, title),
+            footer=archive_format.footer(),
+        )
+        manifest_writer = ArchiveWriter(f"{context.channel.id}-attachments", "jsonl", context.guild.filesize_limit)
+
+        archived = 0
+        lines = []
+        manifest = []
+        last_progress_at = started_at
+        async for message in context.channel.history(
+                limit=limit, before=context.message
+        ):
+            lines.append(archive_format.message(message))
+            for attachment in message.attachments:
+                manifest.append(json.dumps({"message_id": message.id, **attachment_manifest(attachment)}) + "\n")
+            archived += 1
+
+            # History is fetched 100 messages at a time, so the lines are compressed a page at a time
+            if len(lines) == 100:
+                await self.write_archive(context, writer, lines)
+                await self.write_archive(context, manifest_writer, manifest)
+                if time.monotonic() - last_progress_at >= 5:
+                    last_progress_at = time.monotonic()
+                    await progress.edit(content=f"Archived {archived} of {limit} messages...")
+
+        await self.write_archive(context, writer, lines)
+        await self.write_archive(context, manifest_writer, manifest)
+        for part in (writer.close(), manifest_writer.close()):
+            if part is not None:
+                await context.send(file=part)
+        await progress.edit(
+            content=f"Archived {archived} messages in {writer.parts} part{'s' if writer.parts != 1 else ''} "
+                    f"in {time.monotonic() - started_at:.1f}s."
+        )
+
+    @staticmethod
+    async def write_archive(context: Context, writer: ArchiveWriter, lines: list[str]) -> None:
+        """
+        Write buffered lines to an archive and upload the part they finished, if any.
+
+        :param context: The hybrid command context.
+        :param writer: The archive to write to.
+        :param lines: The buffered lines, cleared once written.
+        """
+        if not lines:
+            return
+        part = writer.write("".join(lines))
+        lines.clear()
+        if part is not None:
+            await context.send(file=part)
 
     @commands.hybrid_command(
         name="tweet",
@@ -412,6 +524,7 @@ class Management(commands.Cog, name="management"):
         else:
             caption = ping
 
+        # Reply right away, fetching the tweet can take longer than the interaction may wait for a response
         embed = discord.Embed(
             title=f"Sending tweet: {link}...",
             color=discord.Color.from_str(config["warning_color"]),
@@ -419,10 +532,14 @@ class Management(commands.Cog, name="management"):
         reply = await context.send(embed=embed, ephemeral=True)
 
         try:
-            await twitter(link, caption)
-            logger.info(f'Tweet sent successfully: {link}')
+            tweet_data = await self.bot.twitter.fetch_tweet(link)
+            if tweet_data is None:
+                raise ValueError("the tweet could not be fetched")
+            # The webhook queue delivers the tweet, retrying it if Discord is unavailable or rate limited
+            await self.bot.webhook_queue.enqueue(build_tweet_message(link, tweet_data, caption))
+            logger.info(f'Tweet queued: {link}')
             await reply.edit(
-                embed=discord.Embed(title=f"Tweet sent successfully: {link}",
+                embed=discord.Embed(title=f"Tweet queued: {link}",
                                     color=discord.Color.from_str(config["main_color"])))
         except Exception as e:
             logger.error(f'Failed to send tweet: {e}')
@@ -5,6 +5,8 @@ Description:
 
 Version: 6.1.0
 """
+import asyncio
+import io
 import json
 import os
 
@@ -14,6 +16,7 @@ from discord.ext import commands
 from discord.ext.commands import Context
 
 from helpers.methods import load_config
+from helpers.profiler import Profiler
 
 config = load_config()
 
@@ -25,6 +28,7 @@ class Owner(commands.Cog, name="owner"):
 
     def __init__(self, bot) -> None:
         self.bot = bot
+        self.profiler = Profiler()
 
         # Load the excluded channel IDs from the JSON file into a set
         config_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/excluded_channels.json"
@@ -354,6 +358,147 @@ class Owner(commands.Cog, name="owner"):
         """
         await context.send(file=discord.File("database/database.db"), ephemeral=True)
 
+    @commands.hybrid_command(
+        name="stats",
+        description="Shows the event loop lag and cache statistics.",
+    )
+    @commands.is_owner()
+    async def stats(self, context: Context) -> None:
+        """
+        Shows the event loop lag and cache statistics.
+
+        :param context: The hybrid command context.
+        """
+        watchdog = self.bot.watchdog
+        p50, p95, p99 = watchdog.percentiles(50, 95, 99)
+        embed = discord.Embed(title="Statistics", color=discord.Color.from_str(config["main_color"]))
+        embed.add_field(
+            name="Event loop lag",
+            value=f"```p50: {p50 * 1000:.1f}ms\np95: {p95 * 1000:.1f}ms\np99: {p99 * 1000:.1f}ms\n"
+                  f"max: {watchdog.max_lag * 1000:.1f}ms```",
+            inline=True,
+        )
+        embed.add_field(
+            name="Stalls",
+            value=f"```{watchdog.stalls} over {watchdog.threshold * 1000:.0f}ms in {len(watchdog.lags)} samples```",
+            inline=True,
+        )
+        embed.add_field(name="Gateway latency", value=f"```{self.bot.latency * 1000:.0f}ms```", inline=False)
+        embed.add_field(name="Tasks", value=f"```{len(asyncio.all_tasks())}```", inline=True)
+        embed.add_field(
+            name="Roster cache",
+            value=f"```{self.bot.database.cache_hits} hits, {self.bot.database.cache_misses} misses```",
+            inline=True,
+        )
+        await context.send(embed=embed, ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_command(self, context: Context) -> None:
+        self.profiler.command_started(context)
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, context: Context) -> None:
+        self.profiler.command_finished(context)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, context: Context, error) -> None:
+        self.profiler.command_finished(context)
+
+    async def cog_unload(self) -> None:
+        self.profiler.stop()
+
+    @commands.hybrid_group(
+        name="profile",
+        description="Profile the running bot.",
+    )
+    @commands.is_owner()
+    async def profile(self, context: Context) -> None:
+        """
+        Profile the running bot.
+
+        :param context: The hybrid command context.
+        """
+        if context.invoked_subcommand is None:
+            embed = discord.Embed(
+                description="You need to specify a subcommand.\n\n**Subcommands:**\n`start` - Start profiling.\n"
+                            "`stop` - Stop profiling and get the hottest functions.\n"
+                            "`dump` - Get the allocations that grew since the last dump.",
+                color=discord.Color.from_str(config["error_color"]),
+            )
+            await context.send(embed=embed, ephemeral=True)
+
+    @profile.command(
+        name="start",
+        description="Start profiling for a number of seconds or commands.",
+    )
+    @app_commands.describe(
+        duration="The number of seconds to profile for, at most 600.",
+        command_count="The number of commands to profile, profiling stops after the duration regardless.",
+    )
+    @commands.is_owner()
+    async def profile_start(self, context: Context, duration: int = 60, command_count: int = None) -> None:
+        """
+        Start profiling for a number of seconds or commands.
+
+        :param context: The hybrid command context.
+        :param duration: The number of seconds to profile for, at most 600.
+        :param command_count: The number of commands to profile.
+        """
+        if self.profiler.running:
+            embed = discord.Embed(
+                description="The profiler is already running.",
+                color=discord.Color.from_str(config["error_color"]),
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+
+        duration = min(max(duration, 1), 600)
+        self.profiler.start(duration=duration, commands=command_count)
+        embed = discord.Embed(
+            description=f"Profiling for {duration} seconds"
+                        + (f" or {command_count} commands." if command_count else "."),
+            color=discord.Color.from_str(config["main_color"]),
+        )
+        await context.send(embed=embed, ephemeral=True)
+
+    @profile.command(
+        name="stop",
+        description="Stop profiling and get the hottest functions.",
+    )
+    @commands.is_owner()
+    async def profile_stop(self, context: Context) -> None:
+        """
+        Stop profiling and get the hottest functions of the cogs and the database.
+
+        :param context: The hybrid command context.
+        """
+        report = self.profiler.stop()
+        if report is None:
+            embed = discord.Embed(
+                description="The profiler was not started.",
+                color=discord.Color.from_str(config["error_color"]),
+            )
+            await context.send(embed=embed, ephemeral=True)
+            return
+
+        file = discord.File(io.BytesIO(report.encode("utf-8")), filename="profile.txt")
+        await context.send(file=file, ephemeral=True)
+
+    @profile.command(
+        name="dump",
+        description="Get the allocations that grew since the last dump.",
+    )
+    @commands.is_owner()
+    async def profile_dump(self, context: Context) -> None:
+        """
+        Get the allocations that grew since the last dump, allocations are traced from the first dump on.
+
+        :param context: The hybrid command context.
+        """
+        report = await asyncio.to_thread(self.profiler.diff_allocations)
+        file = discord.File(io.BytesIO(report.encode("utf-8")), filename="allocations.txt")
+        await context.send(file=file, ephemeral=True)
+
     @commands.hybrid_group(
         name="servers",
         description="Get the list of all servers the bot is in.",
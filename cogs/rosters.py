@@ -5,12 +5,9 @@ Description:
 
 Version: 6.1.0
 """
-import json
 import logging
-import os
 from collections import defaultdict
-from typing import List, Dict
-
+from datetime import timedelta
 import discord
 from discord import app_commands
 from discord.app_commands import Choice
@@ -18,6 +15,8 @@ from discord.ext import commands, tasks
 from discord.ext.commands import Context
 
 from helpers import methods
+from helpers.invites import InviteTracker, TryoutInviteStore
+from helpers.role_index import RoleIndex
 
 config = methods.load_config()
 
@@ -31,14 +30,15 @@ async def team_check(team: str | None, context: Context) -> str | None:
     :return: The standardized team name.
     """
     if team is None:
-        if await methods.team_affiliation(context.author) == "Team does not exist.":
+        affiliation = await methods.team_affiliation(context.author)
+        if affiliation == "Team does not exist.":
             embed = discord.Embed(
                 title=f"Team {team} doesn't exist.",
                 color=discord.Color.from_str(config["error_color"]),
             )
             await context.send(embed=embed, ephemeral=True)
             return
-        elif await methods.team_affiliation(context.author) == "Sorry, you need to specify your team.":
+        elif affiliation == "Sorry, you need to specify your team.":
             embed = discord.Embed(
                 title="Please specify your team.",
                 description="You are affiliated with multiple teams.",
@@ -47,7 +47,7 @@ async def team_check(team: str | None, context: Context) -> str | None:
             await context.send(embed=embed, ephemeral=True)
             return
 
-        return await methods.team_affiliation(context.author)
+        return affiliation
     else:
         return methods.standardize_team_name(team)
 
@@ -64,46 +64,67 @@ class Roster(commands.Cog, name="roster"):
         )
         self.bot.tree.add_command(self.context_menu_roster)
         self.logger = logging.getLogger("discord_bot")
-        self.invites = {}
+        self.invite_tracker = InviteTracker()
+        self.tryout_invites = TryoutInviteStore(bot.database)
+        self.role_index = RoleIndex()
+
+    async def cog_load(self) -> None:
+        await self.tryout_invites.load()
         self.clean_expired_invites.start()
+        self.validate_invites.start()
+
+    async def cog_unload(self) -> None:
+        self.clean_expired_invites.cancel()
+        self.validate_invites.cancel()
 
     @commands.Cog.listener()
     async def on_ready(self):
         self.logger.debug("On ready started.")
         for guild in self.bot.guilds:
-            self.invites[guild.id] = await guild.invites()
-            self.logger.debug(f"Cached invites for {guild.name}: {self.invites[guild.id]}")
+            await self.invite_tracker.load(guild)
+            self.logger.debug(f"Cached invites for {guild.name}")
 
     @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        guild = member.guild
+    async def on_invite_create(self, invite: discord.Invite):
+        self.invite_tracker.add(invite)
 
-        # Read the tryout data from the JSON file
-        json_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/tryout_invites.json"
-        with open(json_path, "r") as f:
-            tryout_data = json.load(f)
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite: discord.Invite):
+        self.invite_tracker.remove(invite)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        self.role_index.update_member(before, after)
 
-        # Fetch the new list of invites
-        new_invites = await guild.invites()
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.role_index.remove_member(member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            self.role_index.invalidate(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.role_index.invalidate(role.guild)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        guild = member.guild
+        self.role_index.add_member(member)
 
-        # Find the used invite by comparing old and new invite data
-        used_invite = None
-        for new_invite in new_invites:
-            for cached_invite in self.invites[guild.id]:
-                if new_invite.code == cached_invite.code and new_invite.uses > cached_invite.uses:
-                    used_invite = new_invite
+        # Only tryout and ringer invites assign roles, so there is nothing to look up without any
+        if not self.tryout_invites:
+            return
 
-        # Update the cached invites
-        self.invites[guild.id] = new_invites
+        # Find the used invite by comparing the invites with the cached ones
+        used_invite = await self.invite_tracker.find_used_invite(guild, self.tryout_invites.codes())
 
         if used_invite:  # Check if used_invite is not None
-            role_name = tryout_data.get(str(used_invite.code), None)
+            role_name = self.tryout_invites.get(used_invite.code)
             if role_name:
-                del tryout_data[str(used_invite.code)]
-
-                # Update the JSON file
-                with open(json_path, "w") as f:
-                    json.dump(tryout_data, f)
+                await self.tryout_invites.remove(used_invite.code)
 
                 # Check if the invite has only one use and delete it if true
                 if used_invite.max_uses == 1 and used_invite.uses == 1:
@@ -116,27 +137,20 @@ class Roster(commands.Cog, name="roster"):
                 else:
                     self.logger.warning(f"Role {role_name} not found in guild {guild.name}")
 
-    @tasks.loop(hours=168)
+    @tasks.loop(hours=1)
     async def clean_expired_invites(self):
-        self.logger.info("Cleaning expired invites")
-        try:
-            await self.bot.fetch_channel(1000763776095752302)
-        except discord.NotFound:
-            self.logger.error("Channel not found, Dev bird, Perchance?")
-            return
-        json_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/tryout_invites.json"
+        expired = await self.tryout_invites.expire()
+        if expired:
+            self.logger.info(f"Cleaned {expired} expired tryout invite(s)")
 
-        with open(json_path, "r") as f:
-            tryout_data = json.load(f)
-
-        for code in list(tryout_data.keys()):
-            try:
-                await self.bot.fetch_invite(code)
-            except discord.NotFound:  # Invite not found
-                del tryout_data[code]
+    @tasks.loop(hours=168)
+    async def validate_invites(self):
+        # Catches the invites that were revoked by hand before they expired
+        await self.tryout_invites.validate(self.bot, concurrency=config["invite_validation_concurrency"])
 
-        with open(json_path, "w") as f:
-            json.dump(tryout_data, f)
+    @validate_invites.before_loop
+    async def before_validate_invites(self):
+        await self.bot.wait_until_ready()
 
     @commands.has_any_role("Owner", "CTO", "Managers", "OW | Coach", "Server Staff", "Overwatch Team")
     async def update_all_messages(self, interaction: discord.Interaction, message: discord.Message) -> None:
@@ -149,24 +163,10 @@ class Roster(commands.Cog, name="roster"):
         # Defer the interaction while you do your operations
         await interaction.response.defer(ephemeral=True)
 
-        # Open the JSON file and read the data
-        config_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/message_info.json"
-        try:
-            with open(config_path, 'r') as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            print("Config file not found.")
-            return
-
         # Find out which type of message this is (e.g., "coaches")
-        message_type = None
-        for key, messages in data.items():
-            if any(msg['message_id'] == message.id for msg in messages):
-                message_type = key
-                break
+        message_type = await self.bot.database.get_roster_key(message.id)
 
         if message_type is None:
-            print("Message type not found.")
             embed = discord.Embed(
                 title="This is not the message you are looking for.",
                 description=f"Message type not found.",
@@ -182,51 +182,39 @@ class Roster(commands.Cog, name="roster"):
         else:
             hex_color = "#{:06x}".format(message.embeds[0].color.value)
             team = message_type  # Assuming that message_type is the team name
-            players = await self.bot.database.get_players(team)  # Fetch players from the database
-            team_status = await self.bot.database.get_team_status(team)
+            roster = await self.bot.database.get_roster(team)  # Fetch the team and its players from the database
+            team_status = roster.team[4] if roster else None
+            players = roster.players if roster else []
 
-            new_embeds = self.get_players_embed(interaction, team_status, hex_color, players)
+            new_embeds = methods.get_players_embed(interaction.guild, team_status, hex_color, players)
 
-        await self.fetch_and_update(self.bot, message_type, new_embeds)
+        skipped = await self.fetch_and_update(self.bot, message_type, new_embeds)
 
         # Send a response to let the user know the operation is complete
+        description = f"All {message_type} messages have been updated."
+        if skipped:
+            description += f" {skipped} of them were already up-to-date."
         embed = discord.Embed(
             title="Update Complete",
-            description=f"All {message_type} messages have been updated.",
+            description=description,
             color=discord.Color.from_str(config["main_color"]),
         )
 
         # Finally, send the message as a follow-up to the deferred interaction
         await interaction.followup.send(embed=embed, ephemeral=True)
 
-    async def update_roster(self, context: Context, team: str) -> bool | Exception:
-        try:
-            team_data = await self.bot.database.get_team(team)
-            color = team_data[1]
-
-            players = await self.bot.database.get_players(team)
-
-            team_status = await self.bot.database.get_team_status(team)
-
-            embeds = self.get_players_embed(context, team_status, color, players)
-
-            await self.fetch_and_update(self.bot, team, embeds)
-            return True
-        except Exception as e:
-            return e
+    async def update_roster(self, context: Context, team: str) -> bool:
+        return await self.bot.roster_refresher.refresh(team, context.guild) is None
 
     def get_coaches_embed(self, context: Context):
-        head_coaches = []
-        assistant_head_coaches = []
-        coaches = []
-
-        for member in context.guild.members:
-            if discord.utils.get(member.roles, name="OW | Head Coach"):
-                head_coaches.append(member)
-            elif discord.utils.get(member.roles, name="Assistant Head Coach"):
-                assistant_head_coaches.append(member)
-            elif discord.utils.get(member.roles, name="OW | Coach"):
-                coaches.append(member)
+        head_coaches = self.role_index.members(context.guild, "OW | Head Coach")
+        listed = set(head_coaches)
+        assistant_head_coaches = [member for member in
+                                  self.role_index.members(context.guild, "Assistant Head Coach")
+                                  if member not in listed]
+        listed.update(assistant_head_coaches)
+        coaches = [member for member in self.role_index.members(context.guild, "OW | Coach")
+                   if member not in listed]
 
         # Sort the lists alphabetically
         head_coaches = sorted(head_coaches, key=lambda x: x.name.lower())
@@ -295,10 +283,8 @@ class Roster(commands.Cog, name="roster"):
 
         no_plural_roles = ["Technician Team", "Social Media Team", "Graphics Team"]
 
-        for member in context.guild.members:
-            for role in member.roles:
-                if role.name in roles_dict:
-                    roles_dict[role.name].append(member)
+        for role in roles_dict:
+            roles_dict[role] = self.role_index.members(context.guild, role)
 
         # Sort the lists alphabetically
         for role, members in roles_dict.items():
@@ -332,16 +318,18 @@ class Roster(commands.Cog, name="roster"):
         # List to store managers without teams
         general_managers = []
 
-        # Loop through guild members to populate team_managers_dict and general_managers
-        for member in context.guild.members:
-            if discord.utils.get(member.roles, name="Managers"):
-                # Fetch the list of teams the manager manages
-                managed_teams = await self.bot.database.get_managed_teams(member.id)
-                if managed_teams:
-                    for team in managed_teams:
-                        team_managers_dict[team].append(member)
-                else:
-                    general_managers.append(member)
+        # Fetch the teams of every manager at once
+        managed_teams_by_manager = await self.bot.database.get_managed_teams_by_manager()
+
+        # Loop through the managers to populate team_managers_dict and general_managers
+        managers = sorted(self.role_index.members(context.guild, "Managers"), key=lambda x: x.name.lower())
+        for member in managers:
+            managed_teams = managed_teams_by_manager.get(member.id)
+            if managed_teams:
+                for team in managed_teams:
+                    team_managers_dict[team].append(member)
+            else:
+                general_managers.append(member)
 
         # Populate manager_description_str with team managers
         for team, managers in team_managers_dict.items():
@@ -363,122 +351,11 @@ class Roster(commands.Cog, name="roster"):
 
         return [staff_embed, manager_embed]
 
-    def get_players_embed(self, context: Context, team_status: bool, color: str, players: List[Dict]):
-        roles_order = [
-            ("Staff", ["Head Coach", "Assistant Coach", "Manager"]),
-            ("Players", ["Main Tank", "Off Tank", "Hitscan DPS", "Flex DPS", "Main Support", "Flex Support"]),
-            ("Substitute", ["Substitute"])
-        ]
-
-        emojis = {
-            "Head Coach": "<:HeadCoach:1159488503437078598>",
-            "Assistant Coach": "<:AHC:1159488404950622218>",
-            "Manager": "<:manager:1159872594502242375>",
-            "Main Tank": "<:tank:1159871555128537241>",
-            "Off Tank": "<:offtank:1159872063322988657>",
-            "Hitscan DPS": "<:hitscan:1159872249843699734>",
-            "Flex DPS": "<:flexdps:1159871979315282000>",
-            "Main Support": "<:mainsupport:1159871872842866828>",
-            "Flex Support": "<:flexsupport:1159871932099989595>",
-            "Substitute": "<:sub:1159872018150338661>"
-        }
-
-        roster_dict = {}
-        for _, role_group in roles_order:
-            for role in role_group:
-                roster_dict[role] = []
-
-        for player in players:
-            player_id, role = player[0], player[2]
-            member = context.guild.get_member(player_id)
-            if member:
-                username = member.name
-                mention = member.mention
-                roster_dict[role].append(f"{mention} - `{username}`")
-
-        embeds = []
-        for category, role_group in roles_order:
-            description_str = ""
-            for role in role_group:
-                emoji = emojis.get(role, "")
-                title = f"{emoji} {role}"
-                if roster_dict[role]:
-                    for username in roster_dict[role]:
-                        description_str += f"**{title}:** {username}\n"
-                else:
-                    if team_status:
-                        description_str += f"**{title}:** *Trialing*\n"
-                    else:
-                        pass
-            if description_str:
-                embed = discord.Embed(
-                    description=description_str,
-                    color=discord.Color.from_str(color)
-                )
-                embeds.append(embed)
-
-        return embeds
-
-    def save_message_info(self, message_id, channel_id, team_name):
-        config_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/message_info.json"
+    async def save_message_info(self, message_id, channel_id, team_name):
+        await self.bot.database.add_roster_message(team_name, message_id, channel_id)
 
-        try:
-            with open(config_path, 'r') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            data = {}
-
-        if team_name not in data:
-            data[team_name] = []
-
-        data[team_name].append({'message_id': message_id, 'channel_id': channel_id})
-
-        with open(config_path, 'w') as f:
-            json.dump(data, f)
-
-    async def fetch_and_update(self, bot, team_name, new_embeds):
-        config_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/message_info.json"
-
-        try:
-            with open(config_path, 'r') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            print("No data found.")
-            return
-
-        if team_name not in data:
-            print("Team name not found.")
-            return
-
-        to_remove = []  # Store indexes of messages that are not found
-        for idx, info in enumerate(data[team_name]):
-            channel_id = info['channel_id']
-            message_id = info['message_id']
-
-            channel = bot.get_channel(channel_id)
-            if not channel:
-                print(f"Channel {channel_id} not found.")
-                continue
-
-            message = None  # Initialize message variable
-            try:
-                message = await channel.fetch_message(message_id)
-            except discord.errors.NotFound:
-                print(f"Message {message_id} not found.")
-                to_remove.append(idx)  # Mark this message for removal
-                continue  # Skip to the next iteration
-
-            if message:  # If message was successfully fetched
-                if isinstance(new_embeds, list):
-                    await message.edit(embeds=new_embeds)
-                else:
-                    await message.edit(embeds=[new_embeds])
-
-        # Remove entries for messages that were not found
-        if to_remove:
-            data[team_name] = [info for i, info in enumerate(data[team_name]) if i not in to_remove]
-            with open(config_path, 'w') as f:
-                json.dump(data, f, indent=4)
+    async def fetch_and_update(self, bot, team_name, new_embeds) -> int:
+        return await bot.roster_publisher.publish(team_name, new_embeds)
 
     @commands.hybrid_command(
         name="coaches",
@@ -498,7 +375,7 @@ class Roster(commands.Cog, name="roster"):
             await context.send(embed=embed, ephemeral=True)
             message = await context.channel.send(file=discord.File('graphics/Coaches.png'),
                                                  embed=self.get_coaches_embed(context))
-            self.save_message_info(message.id, message.channel.id, "coaches")
+            await self.save_message_info(message.id, message.channel.id, "coaches")
         else:
             await context.send(file=discord.File('graphics/Coaches.png'), embed=self.get_coaches_embed(context),
                                ephemeral=True)
@@ -549,7 +426,7 @@ class Roster(commands.Cog, name="roster"):
         embeds = await self.get_staff_embed(context)
 
         message = await context.channel.send(file=discord.File('graphics/Staff.png'), embeds=embeds)
-        self.save_message_info(message.id, message.channel.id, "staff")
+        await self.save_message_info(message.id, message.channel.id, "staff")
 
     @commands.hybrid_command(
         name="updatestaff",
@@ -617,7 +494,8 @@ class Roster(commands.Cog, name="roster"):
         team = methods.standardize_team_name(team)
 
         # Check if the team exists
-        if not await self.bot.database.get_team(team):
+        roster = await self.bot.database.get_roster(team)
+        if not roster:
             embed = discord.Embed(
                 title=f"Team {team} doesn't exist.",
                 color=discord.Color.from_str(config["error_color"]),
@@ -625,13 +503,11 @@ class Roster(commands.Cog, name="roster"):
             await context.send(embed=embed, ephemeral=True)
             return
 
-        team_data = await self.bot.database.get_team(team)
+        team_data = roster.team
         color = team_data[1]
         banner_path = team_data[2]
 
-        players = await self.bot.database.get_players(team)
-        team_status = await self.bot.database.get_team_status(team)
-        embeds = self.get_players_embed(context, team_status, color, players)
+        embeds = methods.get_players_embed(context.guild, team_data[4], color, roster.players)
 
         embed = discord.Embed(
             title=f'Alternate eSports {team} Roster',
@@ -640,7 +516,7 @@ class Roster(commands.Cog, name="roster"):
         await context.send(embed=embed, ephemeral=True)
 
         message = await context.channel.send(file=discord.File(banner_path), embeds=embeds)
-        self.save_message_info(message.id, message.channel.id, team)
+        await self.save_message_info(message.id, message.channel.id, team)
 
     @player.command(
         base="player",
@@ -656,6 +532,8 @@ class Roster(commands.Cog, name="roster"):
         :param team: The team to update the roster for.
         """
         team = await team_check(team, context)
+        if team is None:
+            return
 
         embed = discord.Embed(
             title="Updating roster...",
@@ -676,6 +554,43 @@ class Roster(commands.Cog, name="roster"):
             )
             await reply.edit(embed=embed, delete_after=5)
 
+    @player.command(
+        base="player",
+        name="lastupdate",
+        description="Shows the outcome of the last roster update.",
+    )
+    @commands.has_any_role("Owner", "CTO", "Managers", "OW | Coach", "Server Staff", "Technician Team")
+    async def last_update(self, context: Context, team: str = None) -> None:
+        """
+        Shows the outcome of the last roster update.
+
+        :param context: The hybrid command context.
+        :param team: The team to show the last roster update for.
+        """
+        team = await team_check(team, context)
+        if team is None:
+            return
+
+        refresh = await self.bot.database.get_roster_refresh(team)
+        if refresh is None:
+            embed = discord.Embed(
+                title=f"The {team} roster has not been updated yet.",
+                color=discord.Color.from_str(config["warning_color"]),
+            )
+        elif refresh[1] is None:
+            embed = discord.Embed(
+                title=f"The {team} roster was updated.",
+                description=f"Last update: <t:{refresh[0]}:R>",
+                color=discord.Color.from_str(config["main_color"]),
+            )
+        else:
+            embed = discord.Embed(
+                title=f"The last {team} roster update failed.",
+                description=f"Last update: <t:{refresh[0]}:R>\n```{refresh[1]}```",
+                color=discord.Color.from_str(config["error_color"]),
+            )
+        await context.send(embed=embed, ephemeral=True)
+
     @player.command(
         base="player",
         name="sign",
@@ -807,19 +722,12 @@ class Roster(commands.Cog, name="roster"):
                     await member.add_roles(*roles_to_add)
                 await context.interaction.followup.send(embed=embed, ephemeral=True)
 
-                if await self.update_roster(context, team):
-                    embed = discord.Embed(
-                        title="Rosters updated.",
-                        color=discord.Color.from_str(config["main_color"])
-                    )
-                    await context.interaction.followup.send(embed=embed, ephemeral=True)
-                else:
-                    e = await self.update_roster(context, team)
-                    embed = discord.Embed(
-                        title="Something went wrong: " + str(e),
-                        color=discord.Color.from_str(config["error_color"]),
-                    )
-                    await context.interaction.followup.send(embed=embed, ephemeral=True)
+                self.bot.roster_refresher.enqueue(team, context.guild)
+                embed = discord.Embed(
+                    title="Roster update queued.",
+                    color=discord.Color.from_str(config["main_color"])
+                )
+                await context.interaction.followup.send(embed=embed, ephemeral=True)
         except Exception as e:
             embed = discord.Embed(
                 title="An error occurred",
@@ -857,6 +765,8 @@ class Roster(commands.Cog, name="roster"):
         :param team: The team of the player.
         """
         team = await team_check(team, context)
+        if team is None:
+            return
 
         await context.interaction.response.defer(ephemeral=True)
         player_id = member.id
@@ -895,18 +805,12 @@ class Roster(commands.Cog, name="roster"):
         )
         await context.interaction.followup.send(embed=embed, ephemeral=True)
 
-        if await self.update_roster(context, team):
-            embed = discord.Embed(
-                title="Rosters updated.",
-                color=discord.Color.from_str(config["main_color"])
-            )
-            await context.interaction.followup.send(embed=embed, ephemeral=True)
-        else:
-            embed = discord.Embed(
-                title="Something went wrong",
-                color=discord.Color.from_str(config["error_color"]),
-            )
-            await context.interaction.followup.send(embed=embed, ephemeral=True)
+        self.bot.roster_refresher.enqueue(team, context.guild)
+        embed = discord.Embed(
+            title="Roster update queued.",
+            color=discord.Color.from_str(config["main_color"])
+        )
+        await context.interaction.followup.send(embed=embed, ephemeral=True)
 
     @player.command(
         base="player",
@@ -952,20 +856,16 @@ class Roster(commands.Cog, name="roster"):
         await context.send(embed=embed, ephemeral=True)
 
         team = await self.bot.database.get_player_team(player_id)
-        print(team)
+        if team is None:
+            # The player was removed from their team while they were edited
+            return
 
-        if await self.update_roster(context, team):
-            embed = discord.Embed(
-                title="Rosters updated.",
-                color=discord.Color.from_str(config["main_color"])
-            )
-            await context.interaction.followup.send(embed=embed, ephemeral=True)
-        else:
-            embed = discord.Embed(
-                title="Something went wrong",
-                color=discord.Color.from_str(config["error_color"]),
-            )
-            await context.interaction.followup.send(embed=embed, ephemeral=True)
+        self.bot.roster_refresher.enqueue(team, context.guild)
+        embed = discord.Embed(
+            title="Roster update queued.",
+            color=discord.Color.from_str(config["main_color"])
+        )
+        await context.interaction.followup.send(embed=embed, ephemeral=True)
 
     @commands.hybrid_command(
         name="tryout",
@@ -1023,22 +923,9 @@ class Roster(commands.Cog, name="roster"):
 
             invite = await channel.create_invite(max_age=604800, max_uses=amount + 1, unique=True,
                                                  reason="Tryout invite")
-            self.invites[context.guild.id] = await context.guild.invites()
-            json_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/tryout_invites.json"
-
-            if os.path.exists(json_path):
-                with open(json_path, "r") as f:
-                    file_content = f.read()
-                    if file_content:
-                        tryout_data = json.loads(file_content)
-                    else:
-                        tryout_data = {}  # Initialize as empty dictionary if the file is empty
-
-            role_name = f"OW | {stripped_team_name} Tryout"
-            tryout_data[str(invite.code)] = role_name
-
-            with open(json_path, "w") as f:
-                json.dump(tryout_data, f)
+            self.invite_tracker.add(invite)
+            expires_at = invite.expires_at or discord.utils.utcnow() + timedelta(seconds=604800)
+            await self.tryout_invites.add(invite.code, f"OW | {stripped_team_name} Tryout", expires_at)
 
             embed.add_field(name="Invite link", value=f"```{invite.url}```", inline=False)
 
@@ -1100,22 +987,9 @@ class Roster(commands.Cog, name="roster"):
 
             invite = await channel.create_invite(max_age=604800, max_uses=amount + 1, unique=True,
                                                  reason="Ringer invite")
-            self.invites[context.guild.id] = await context.guild.invites()
-            json_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/tryout_invites.json"
-
-            if os.path.exists(json_path):
-                with open(json_path, "r") as f:
-                    file_content = f.read()
-                    if file_content:
-                        tryout_data = json.loads(file_content)
-                    else:
-                        tryout_data = {}  # Initialize as empty dictionary if the file is empty
-
-            role_name = f"OW | {stripped_team_name} Ringer"
-            tryout_data[str(invite.code)] = role_name
-
-            with open(json_path, "w") as f:
-                json.dump(tryout_data, f)
+            self.invite_tracker.add(invite)
+            expires_at = invite.expires_at or discord.utils.utcnow() + timedelta(seconds=604800)
+            await self.tryout_invites.add(invite.code, f"OW | {stripped_team_name} Ringer", expires_at)
 
             embed.add_field(name="Invite link", value=f"```{invite.url}```", inline=False)
 
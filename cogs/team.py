@@ -6,7 +6,6 @@ Description:
 Version: 6.1.0
 """
 import asyncio
-import json
 import os
 
 import discord
@@ -15,7 +14,6 @@ from discord.app_commands import Choice
 from discord.ext import commands
 from discord.ext.commands import Context
 
-from typing import List, Dict
 import traceback
 
 from helpers import methods
@@ -82,120 +80,6 @@ class Team(commands.Cog, name="team"):
     def __init__(self, bot) -> None:
         self.bot = bot
 
-    def get_players_embed(self, context: Context, team_status: bool, color: str, players: List[Dict]):
-        roles_order = [
-            ("Staff", ["Head Coach", "Assistant Coach", "Manager"]),
-            ("Players", ["Main Tank", "Off Tank", "Hitscan DPS", "Flex DPS", "Main Support", "Flex Support"]),
-            ("Substitute", ["Substitute"])
-        ]
-
-        emojis = {
-            "Head Coach": "<:HeadCoach:1159488503437078598>",
-            "Assistant Coach": "<:AHC:1159488404950622218>",
-            "Manager": "<:manager:1159872594502242375>",
-            "Main Tank": "<:tank:1159871555128537241>",
-            "Off Tank": "<:offtank:1159872063322988657>",
-            "Hitscan DPS": "<:hitscan:1159872249843699734>",
-            "Flex DPS": "<:flexdps:1159871979315282000>",
-            "Main Support": "<:mainsupport:1159871872842866828>",
-            "Flex Support": "<:flexsupport:1159871932099989595>",
-            "Substitute": "<:sub:1159872018150338661>"
-        }
-
-        roster_dict = {}
-        for _, role_group in roles_order:
-            for role in role_group:
-                roster_dict[role] = []
-
-        for player in players:
-            player_id, role = player[0], player[2]
-            member = context.guild.get_member(player_id)
-            if member:
-                username = member.name
-                mention = member.mention
-                roster_dict[role].append(f"{mention} - `{username}`")
-
-        embeds = []
-        for category, role_group in roles_order:
-            description_str = ""
-            for role in role_group:
-                emoji = emojis.get(role, "")
-                title = f"{emoji} {role}"
-                if roster_dict[role]:
-                    for username in roster_dict[role]:
-                        description_str += f"**{title}:** {username}\n"
-                else:
-                    if team_status:
-                        description_str += f"**{title}:** *Trialing*\n"
-                    else:
-                        pass
-
-            if description_str:
-                embed = discord.Embed(
-                    description=description_str,
-                    color=discord.Color.from_str(color)
-                )
-                embeds.append(embed)
-
-        return embeds
-
-    async def fetch_and_update(self, bot, team_name, new_embeds):
-        config_path = f"{os.path.realpath(os.path.dirname(__file__))}/../configs/message_info.json"
-
-        try:
-            with open(config_path, 'r') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            print("No data found.")
-            return
-
-        if team_name not in data:
-            print("Team name not found.")
-            return
-
-        to_remove = []  # Store indexes of messages that are not found
-        for idx, info in enumerate(data[team_name]):
-            channel_id = info['channel_id']
-            message_id = info['message_id']
-
-            channel = bot.get_channel(channel_id)
-            if not channel:
-                print(f"Channel {channel_id} not found.")
-                continue
-
-            message = None  # Initialize message variable
-            try:
-                message = await channel.fetch_message(message_id)
-            except discord.errors.NotFound:
-                print(f"Message {message_id} not found.")
-                to_remove.append(idx)  # Mark this message for removal
-                continue  # Skip to the next iteration
-
-            if message:  # If message was successfully fetched
-                if isinstance(new_embeds, list):
-                    await message.edit(embeds=new_embeds)
-                else:
-                    await message.edit(embeds=[new_embeds])
-
-        # Remove entries for messages that were not found
-        if to_remove:
-            data[team_name] = [info for i, info in enumerate(data[team_name]) if i not in to_remove]
-            with open(config_path, 'w') as f:
-                json.dump(data, f, indent=4)
-
-    async def update_roster(self, context: Context, team: str) -> bool:
-        team_data = await self.bot.database.get_team(team)
-        color = team_data[1]
-
-        players = await self.bot.database.get_players(team)
-
-        team_status = await self.bot.database.get_team_status(team)
-
-        embeds = self.get_players_embed(context, team_status, color, players)
-
-        await self.fetch_and_update(self.bot, team, embeds)
-        return True
-
     @commands.hybrid_group(
         name="team",
         description="Lists, create, edit, delete and change trialing status of Alternate eSports teams.",
@@ -442,14 +326,15 @@ class Team(commands.Cog, name="team"):
         :param team: The name of the team to change status.
         """
         if team is None:
-            if await methods.team_affiliation(context.author) == "Team does not exist.":
+            affiliation = await methods.team_affiliation(context.author)
+            if affiliation == "Team does not exist.":
                 embed = discord.Embed(
                     title=f"Team {team} doesn't exist.",
                     color=discord.Color.from_str(config["error_color"]),
                 )
                 await context.send(embed=embed, ephemeral=True)
                 return
-            elif await methods.team_affiliation(context.author) == "Sorry, you need to specify your team.":
+            elif affiliation == "Sorry, you need to specify your team.":
                 embed = discord.Embed(
                     title="Please specify your team.",
                     description="You are affiliated with multiple teams.",
@@ -458,7 +343,7 @@ class Team(commands.Cog, name="team"):
                 await context.send(embed=embed, ephemeral=True)
                 return
             else:
-                team = await methods.team_affiliation(context.author)
+                team = affiliation
         else:
             team = methods.standardize_team_name(team)
 
@@ -471,7 +356,7 @@ class Team(commands.Cog, name="team"):
             await context.send(embed=embed, ephemeral=True)
             return
 
-        is_trialing = await self.bot.database.get_team_status(team)
+        is_trialing = existing_team[4]
         new_status = not is_trialing
 
         await self.bot.database.update_team_status(team, new_status)
@@ -482,18 +367,12 @@ class Team(commands.Cog, name="team"):
         )
         await context.send(embed=embed, ephemeral=True, delete_after=5)
 
-        if await self.update_roster(context, team):
-            embed = discord.Embed(
-                title="Rosters updated.",
-                color=discord.Color.from_str(config["main_color"])
-            )
-            await context.interaction.followup.send(embed=embed, ephemeral=True)
-        else:
-            embed = discord.Embed(
-                title="Something went wrong",
-                color=discord.Color.from_str(config["error_color"]),
-            )
-            await context.interaction.followup.send(embed=embed, ephemeral=True)
+        self.bot.roster_refresher.enqueue(team, context.guild)
+        embed = discord.Embed(
+            title="Roster update queued.",
+            color=discord.Color.from_str(config["main_color"])
+        )
+        await context.interaction.followup.send(embed=embed, ephemeral=True)
 
 
 async def setup(bot) -> None:
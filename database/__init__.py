@@ -6,12 +6,299 @@ Description:
 Version: 6.1.0
 """
 
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import pathlib
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
 import aiosqlite
 
+MIGRATIONS_PATH = f"{os.path.realpath(os.path.dirname(__file__))}/migrations"
+
+# Set while the current task is inside DatabaseManager.transaction()
+_in_transaction = contextvars.ContextVar("in_transaction", default=False)
+
+
+async def run_migrations(connection: aiosqlite.Connection) -> int:
+    """
+    This function will apply every migration in the migrations folder that is newer than the database.
+
+    Migrations are named `<version>_<description>.sql` and the applied version is kept in `PRAGMA user_version`,
+    each migration runs in its own transaction together with the version bump.
+
+    :param connection: The connection to the database that should be migrated.
+    :return: The schema version of the database after the migrations.
+    """
+    async with connection.execute("PRAGMA user_version") as cursor:
+        current_version = (await cursor.fetchone())[0]
+
+    for file in sorted(os.listdir(MIGRATIONS_PATH)):
+        if not file.endswith(".sql"):
+            continue
+        version = int(file.split("_", 1)[0])
+        if version <= current_version:
+            continue
+        with open(f"{MIGRATIONS_PATH}/{file}") as migration:
+            script = migration.read()
+        await connection.executescript(
+            f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;"
+        )
+        current_version = version
+
+    return current_version
+
+
+class TeamSnapshot(NamedTuple):
+    """
+    An immutable view of a team row and its players, as cached by the database manager.
+    """
+    team: tuple
+    players: tuple
+    players_by_role: Mapping[str, tuple]
+
 
 class DatabaseManager:
-    def __init__(self, *, connection: aiosqlite.Connection) -> None:
+    def __init__(
+            self,
+            *,
+            connection: aiosqlite.Connection,
+            readers: list[aiosqlite.Connection] = None,
+    ) -> None:
         self.connection = connection
+        self.readers = readers or []
+        self._pending_commit = None
+        # The task running the commits, the event loop only keeps a weak reference to it
+        self._flush_task = None
+        # transaction() blocks run one at a time and no other write runs its statements while a block is open
+        self._transaction_lock = asyncio.Lock()
+        self._transaction_open = False
+        self._transaction_closed = asyncio.Event()
+        self._transaction_closed.set()
+        self._active_writes = 0
+        self._writes_idle = asyncio.Event()
+        self._writes_idle.set()
+        self._rosters = {}
+        self._roster_generations = {}
+        self._pending_invalidations = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._idle_readers = asyncio.Queue()
+        for reader in self.readers:
+            self._idle_readers.put_nowait(reader)
+
+    @classmethod
+    async def connect(cls, path: str, *, readers: int = 4, **kwargs) -> "DatabaseManager":
+        """
+        This function will open the database in WAL mode with one writer and a pool of read-only connections.
+
+        In WAL mode the readers see the last committed state and never wait behind a pending commit of the writer.
+
+        :param path: The path to the database file.
+        :param readers: The number of read-only connections to keep in the pool.
+        :return: The database manager using the opened connections.
+        """
+        connection = await aiosqlite.connect(path)
+        async with connection.execute("PRAGMA journal_mode=WAL") as cursor:
+            await cursor.fetchone()
+        uri = f"{pathlib.Path(path).resolve().as_uri()}?mode=ro"
+        reader_connections = [await aiosqlite.connect(uri, uri=True) for _ in range(readers)]
+        return cls(connection=connection, readers=reader_connections, **kwargs)
+
+    async def close(self) -> None:
+        """
+        This function will commit the pending writes and close every connection.
+        """
+        while self._flush_task is not None:
+            await self._flush_task
+        if self._pending_commit is not None:
+            await self._flush()
+        for reader in self.readers:
+            await reader.close()
+        await self.connection.close()
+
+    @contextlib.asynccontextmanager
+    async def _read_cursor(self):
+        # Reads inside a transaction have to see its uncommitted writes, so they stay on the writer
+        if not self.readers or _in_transaction.get():
+            async with self.connection.cursor() as cursor:
+                yield cursor
+            return
+
+        reader = await self._idle_readers.get()
+        try:
+            async with reader.cursor() as cursor:
+                yield cursor
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    @contextlib.asynccontextmanager
+    async def _write_cursor(self):
+        # A write of another task would otherwise end up in an open transaction() block and be lost if it rolls back
+        if _in_transaction.get():
+            async with self.connection.cursor() as cursor:
+                yield cursor
+            return
+
+        while self._transaction_open:
+            await self._transaction_closed.wait()
+        self._active_writes += 1
+        self._writes_idle.clear()
+        try:
+            async with self.connection.cursor() as cursor:
+                yield cursor
+        finally:
+            self._active_writes -= 1
+            if not self._active_writes:
+                self._writes_idle.set()
+
+    async def commit(self, *, invalidate: tuple = ()) -> None:
+        """
+        This function will wait until the writes made so far have been committed to the database.
+
+        The commit starts right away when no other commit is running, writes made while one is running share the next
+        one. Inside a `transaction()` block this returns immediately and the commit happens when the block exits.
+
+        :param invalidate: The names of the teams whose cached roster is outdated once the commit lands.
+        """
+        self._pending_invalidations.update(invalidate)
+        if _in_transaction.get():
+            return
+        if self._pending_commit is None:
+            self._pending_commit = asyncio.get_running_loop().create_future()
+        pending = self._pending_commit
+        self._start_flush()
+        await asyncio.shield(pending)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """
+        This function will group every write made inside the block into a single commit.
+
+        Blocks run one at a time and the writes of other tasks wait until the block exits, so a rollback only ever
+        discards the writes of its own block. The commit happens when the block exits, if the block raises its writes
+        are rolled back.
+        """
+        if _in_transaction.get():
+            yield self
+            return
+
+        async with self._transaction_lock:
+            self._transaction_open = True
+            self._transaction_closed.clear()
+            try:
+                # The writes made before the block are committed first, they must not be rolled back with it
+                await self._writes_idle.wait()
+                while self._flush_task is not None:
+                    await asyncio.shield(self._flush_task)
+                if self._pending_commit is not None:
+                    await self._flush()
+                token = _in_transaction.set(True)
+                try:
+                    yield self
+                except BaseException:
+                    await self._rollback()
+                    raise
+                else:
+                    await self._flush()
+                finally:
+                    _in_transaction.reset(token)
+            finally:
+                self._transaction_open = False
+                self._transaction_closed.set()
+                if self._pending_commit is not None:
+                    self._start_flush()
+
+    def _start_flush(self) -> None:
+        # An open transaction() block commits the pending writes itself when it exits
+        if self._flush_task is None and not self._transaction_open:
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self) -> None:
+        try:
+            while self._pending_commit is not None and not self._transaction_open:
+                await self._flush(raise_errors=False)
+        finally:
+            self._flush_task = None
+
+    async def _flush(self, raise_errors: bool = True) -> None:
+        pending, self._pending_commit = self._pending_commit, None
+        invalidations, self._pending_invalidations = self._pending_invalidations, set()
+        try:
+            await self.connection.commit()
+        except Exception as e:
+            self._invalidate(*invalidations)
+            if pending is not None:
+                pending.set_exception(e)
+            if raise_errors:
+                raise
+        else:
+            self._invalidate(*invalidations)
+            if pending is not None:
+                pending.set_result(None)
+
+    async def _rollback(self) -> None:
+        await self.connection.rollback()
+        self._invalidate(*self._pending_invalidations)
+        # Commits waited on by other tasks still run once the block exits, along with their invalidations
+        if self._pending_commit is None:
+            self._pending_invalidations.clear()
+
+    def _invalidate(self, *team_names: str) -> None:
+        for team_name in team_names:
+            if team_name is None:
+                continue
+            self._rosters.pop(team_name, None)
+            # Loads that started before the invalidation must not store what they read
+            self._roster_generations[team_name] = self._roster_generations.get(team_name, 0) + 1
+
+    async def get_roster(self, team_name: str) -> TeamSnapshot | None:
+        """
+        This function will get the team row and its players, served from the roster cache when possible.
+
+        :param team_name: The name of the team.
+        :return: The snapshot of the team, or None if the team does not exist.
+        """
+        if _in_transaction.get():
+            return await self._load_roster(team_name)
+
+        snapshot = self._rosters.get(team_name)
+        if snapshot is not None:
+            self.cache_hits += 1
+            return snapshot
+
+        self.cache_misses += 1
+        generation = self._roster_generations.get(team_name, 0)
+        snapshot = await self._load_roster(team_name)
+        if snapshot is not None and self._roster_generations.get(team_name, 0) == generation:
+            self._rosters[team_name] = snapshot
+        return snapshot
+
+    async def _load_roster(self, team_name: str) -> TeamSnapshot | None:
+        async with self._read_cursor() as cursor:
+            await cursor.execute("SELECT * FROM teams WHERE team_name = ?", (team_name,))
+            team = await cursor.fetchone()
+            if team is None:
+                return None
+            await cursor.execute("SELECT * FROM players WHERE team_name = ?", (team_name,))
+            players = tuple(await cursor.fetchall())
+
+        players_by_role = {}
+        for player in players:
+            players_by_role.setdefault(player[2], []).append(player)
+        return TeamSnapshot(
+            team=tuple(team),
+            players=players,
+            players_by_role=MappingProxyType({role: tuple(rows) for role, rows in players_by_role.items()}),
+        )
+
+    async def _get_player_teams(self, player_id: int) -> tuple:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute("SELECT DISTINCT team_name FROM players WHERE player_id = ?", (player_id,))
+            return tuple(row[0] for row in await cursor.fetchall())
 
     async def add_warn(
             self, user_id: int, server_id: int, moderator_id: int, reason: str
@@ -22,17 +309,17 @@ class DatabaseManager:
         :param user_id: The ID of the user that should be warned.
         :param reason: The reason why the user should be warned.
         """
-        rows = await self.connection.execute(
-            "SELECT id FROM warns WHERE user_id=? AND server_id=? ORDER BY id DESC LIMIT 1",
-            (
-                user_id,
-                server_id,
-            ),
-        )
-        async with rows as cursor:
+        async with self._write_cursor() as cursor:
+            await cursor.execute(
+                "SELECT id FROM warns WHERE user_id=? AND server_id=? ORDER BY id DESC LIMIT 1",
+                (
+                    user_id,
+                    server_id,
+                ),
+            )
             result = await cursor.fetchone()
             warn_id = result[0] + 1 if result is not None else 1
-            await self.connection.execute(
+            await cursor.execute(
                 "INSERT INTO warns(id, user_id, server_id, moderator_id, reason) VALUES (?, ?, ?, ?, ?)",
                 (
                     warn_id,
@@ -42,8 +329,8 @@ class DatabaseManager:
                     reason,
                 ),
             )
-            await self.connection.commit()
-            return warn_id
+        await self.commit()
+        return warn_id
 
     async def remove_warn(self, warn_id: int, user_id: int, server_id: int) -> int:
         """
@@ -53,23 +340,24 @@ class DatabaseManager:
         :param user_id: The ID of the user that was warned.
         :param server_id: The ID of the server where the user has been warned
         """
-        await self.connection.execute(
-            "DELETE FROM warns WHERE id=? AND user_id=? AND server_id=?",
-            (
-                warn_id,
-                user_id,
-                server_id,
-            ),
-        )
-        await self.connection.commit()
-        rows = await self.connection.execute(
-            "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?",
-            (
-                user_id,
-                server_id,
-            ),
-        )
-        async with rows as cursor:
+        async with self._write_cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM warns WHERE id=? AND user_id=? AND server_id=?",
+                (
+                    warn_id,
+                    user_id,
+                    server_id,
+                ),
+            )
+        await self.commit()
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?",
+                (
+                    user_id,
+                    server_id,
+                ),
+            )
             result = await cursor.fetchone()
             return result[0] if result is not None else 0
 
@@ -81,14 +369,14 @@ class DatabaseManager:
         :param server_id: The ID of the server that should be checked.
         :return: A list of all the warnings of the user.
         """
-        rows = await self.connection.execute(
-            "SELECT user_id, server_id, moderator_id, reason, strftime('%s', created_at), id FROM warns WHERE user_id=? AND server_id=?",
-            (
-                user_id,
-                server_id,
-            ),
-        )
-        async with rows as cursor:
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT user_id, server_id, moderator_id, reason, strftime('%s', created_at), id FROM warns WHERE user_id=? AND server_id=?",
+                (
+                    user_id,
+                    server_id,
+                ),
+            )
             result = await cursor.fetchall()
             result_list = []
             for row in result:
@@ -96,21 +384,21 @@ class DatabaseManager:
             return result_list
 
     async def create_team(self, team_name: str, color: str, banner: str, rank: str = None):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             await cursor.execute(
                 "INSERT INTO teams (team_name, color, banner, rank) VALUES (?, ?, ?, ?)",
                 (team_name, color, banner, rank)
             )
-            await self.connection.commit()
+        await self.commit(invalidate=(team_name,))
 
     async def delete_team(self, team_name: str):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             await cursor.execute("DELETE FROM teams WHERE team_name = ?", (team_name,))
-            await self.connection.commit()
+        await self.commit(invalidate=(team_name,))
 
     async def edit_team(self, team_name: str, new_name: str = None, color: str = None, banner: str = None,
                         rank: str = None):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             fields = []
             values = []
 
@@ -134,63 +422,75 @@ class DatabaseManager:
             values.append(team_name)
 
             await cursor.execute(query, values)
-            await self.connection.commit()
+        await self.commit(invalidate=(team_name, new_name))
 
     async def update_team_banner(self, team_name: str, new_banner_path: str):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             await cursor.execute(
                 "UPDATE teams SET banner = ? WHERE team_name = ?",
                 (new_banner_path, team_name)
             )
-            await self.connection.commit()
+        await self.commit(invalidate=(team_name,))
 
     async def get_managed_teams(self, player_id: int):
-        async with self.connection.cursor() as cursor:
+        async with self._read_cursor() as cursor:
             await cursor.execute("SELECT team_name FROM players WHERE player_id = ? AND role = 'Manager'", (player_id,))
             rows = await cursor.fetchall()
             return [row[0] for row in rows]
 
+    async def get_managed_teams_by_manager(self) -> dict:
+        """
+        This function will get the teams of every manager in a single query.
+
+        :return: A dictionary mapping each manager ID to the list of teams they manage.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute("SELECT player_id, team_name FROM players WHERE role = 'Manager'")
+            rows = await cursor.fetchall()
+
+        managed_teams = {}
+        for player_id, team_name in rows:
+            managed_teams.setdefault(player_id, []).append(team_name)
+        return managed_teams
+
     async def get_team(self, team_name: str):
-        async with self.connection.cursor() as cursor:
-            await cursor.execute("SELECT * FROM teams WHERE team_name = ?", (team_name,))
-            return await cursor.fetchone()
+        snapshot = await self.get_roster(team_name)
+        return snapshot.team if snapshot else None
 
     async def get_teams(self):
-        async with self.connection.cursor() as cursor:
+        async with self._read_cursor() as cursor:
             await cursor.execute("SELECT * FROM teams")
             return await cursor.fetchall()
 
     async def get_team_status(self, team_name: str) -> bool:
         # return bool in 4th column
-        async with self.connection.cursor() as cursor:
-            await cursor.execute("SELECT is_trialing FROM teams WHERE team_name = ?", (team_name,))
-            result = await cursor.fetchone()
-            return result[0] if result else None
+        snapshot = await self.get_roster(team_name)
+        return snapshot.team[4] if snapshot else None
 
     async def update_team_status(self, team_name: str, is_trialing: bool):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             await cursor.execute(
                 "UPDATE teams SET is_trialing = ? WHERE team_name = ?",
                 (is_trialing, team_name)
             )
-            await self.connection.commit()
+        await self.commit(invalidate=(team_name,))
 
     async def get_player_team(self, player_id: int):
-        async with self.connection.cursor() as cursor:
+        async with self._read_cursor() as cursor:
             await cursor.execute("SELECT team_name FROM players WHERE player_id = ?", (player_id,))
             result = await cursor.fetchone()
             return result[0] if result else None
 
     async def add_player(self, player_id: int, team_name: str, role: str):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             await cursor.execute(
                 "INSERT INTO players (player_id, team_name, role) VALUES (?, ?, ?)",
                 (player_id, team_name, role)
             )
-            await self.connection.commit()
+        await self.commit(invalidate=(team_name,))
 
     async def delete_player(self, player_id: int, role: str = None, team_name: str = None):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             query = "DELETE FROM players WHERE player_id = ?"
             params = [player_id]
 
@@ -201,12 +501,15 @@ class DatabaseManager:
             if team_name is not None:
                 query += " AND team_name = ?"
                 params.append(team_name)
+                affected_teams = (team_name,)
+            else:
+                affected_teams = await self._get_player_teams(player_id)
 
             await cursor.execute(query, params)
-            await self.connection.commit()
+        await self.commit(invalidate=affected_teams)
 
     async def edit_player(self, player_id: int, team_name: str = None, role: str = None):
-        async with self.connection.cursor() as cursor:
+        async with self._write_cursor() as cursor:
             fields = []
             values = []
 
@@ -222,16 +525,307 @@ class DatabaseManager:
 
             query = f"UPDATE players SET {', '.join(fields)} WHERE player_id = ?"
             values.append(player_id)
+            affected_teams = await self._get_player_teams(player_id) + (team_name,)
 
             await cursor.execute(query, values)
-            await self.connection.commit()
+        await self.commit(invalidate=affected_teams)
+
+    async def record_roster_refresh(self, team_name: str, error: Exception = None) -> None:
+        """
+        This function will store the outcome of the last refresh of a team roster.
+
+        :param team_name: The name of the team.
+        :param error: The error that made the refresh fail, None if it succeeded.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.execute(
+                "INSERT INTO roster_refreshes (team_name, refreshed_at, error) VALUES (?, CURRENT_TIMESTAMP, ?) "
+                "ON CONFLICT (team_name) DO UPDATE SET refreshed_at = excluded.refreshed_at, error = excluded.error",
+                (team_name, str(error)[:255] if error is not None else None)
+            )
+        await self.commit()
+
+    async def get_roster_refresh(self, team_name: str):
+        """
+        This function will get the outcome of the last refresh of a team roster.
+
+        :param team_name: The name of the team.
+        :return: The UNIX timestamp of the refresh and its error, or None if the roster was never refreshed.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT strftime('%s', refreshed_at), error FROM roster_refreshes WHERE team_name = ?",
+                (team_name,)
+            )
+            return await cursor.fetchone()
+
+    async def add_roster_message(self, roster_key: str, message_id: int, channel_id: int) -> None:
+        """
+        This function will track a posted roster message so it gets updated with the roster.
+
+        :param roster_key: The roster the message shows, a team name, "coaches" or "staff".
+        :param message_id: The ID of the message.
+        :param channel_id: The ID of the channel the message is in.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.execute(
+                "INSERT OR REPLACE INTO roster_messages (message_id, channel_id, roster_key) VALUES (?, ?, ?)",
+                (message_id, channel_id, roster_key)
+            )
+        await self.commit()
+
+    async def get_roster_messages(self, roster_key: str) -> list:
+        """
+        This function will get the messages showing a roster.
+
+        :param roster_key: The roster the messages show.
+        :return: A list of (message_id, channel_id) rows, oldest message first.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT message_id, channel_id FROM roster_messages WHERE roster_key = ? ORDER BY message_id",
+                (roster_key,)
+            )
+            return await cursor.fetchall()
+
+    async def get_roster_key(self, message_id: int) -> str | None:
+        """
+        This function will get the roster a message shows.
+
+        :param message_id: The ID of the message.
+        :return: The roster key, or None if the message is not a roster message.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute("SELECT roster_key FROM roster_messages WHERE message_id = ?", (message_id,))
+            result = await cursor.fetchone()
+            return result[0] if result else None
+
+    async def delete_roster_messages(self, message_ids) -> None:
+        """
+        This function will stop tracking roster messages, for example after they were deleted.
+
+        :param message_ids: The IDs of the messages.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.executemany(
+                "DELETE FROM roster_messages WHERE message_id = ?", [(message_id,) for message_id in message_ids]
+            )
+        await self.commit()
+
+    async def import_message_info(self, path: str) -> int:
+        """
+        This function will import the roster messages of the legacy message_info.json file, once.
+
+        The file is renamed to `<path>.imported` afterwards so it is not imported again.
+
+        :param path: The path to the message_info.json file.
+        :return: The number of imported messages.
+        """
+        if not os.path.isfile(path):
+            return 0
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except json.JSONDecodeError:
+            data = {}
+
+        rows = [
+            (info["message_id"], info["channel_id"], roster_key)
+            for roster_key, messages in data.items()
+            for info in messages
+        ]
+        async with self._write_cursor() as cursor:
+            await cursor.executemany(
+                "INSERT OR IGNORE INTO roster_messages (message_id, channel_id, roster_key) VALUES (?, ?, ?)", rows
+            )
+        await self.commit()
+        os.replace(path, f"{path}.imported")
+        return len(rows)
+
+    async def add_tryout_invite(self, code: str, role_name: str, expires_at: float = None) -> None:
+        """
+        This function will store the role a tryout or ringer invite grants.
+
+        :param code: The code of the invite.
+        :param role_name: The name of the role given to members joining with the invite.
+        :param expires_at: The UNIX timestamp the invite expires at, None if it never expires.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.execute(
+                "INSERT OR REPLACE INTO tryout_invites (code, role_name, expires_at) VALUES (?, ?, ?)",
+                (code, role_name, expires_at)
+            )
+        await self.commit()
+
+    async def get_tryout_invites(self) -> list:
+        """
+        This function will get every stored tryout and ringer invite.
+
+        :return: A list of (code, role_name, expires_at) rows.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute("SELECT code, role_name, expires_at FROM tryout_invites")
+            return await cursor.fetchall()
+
+    async def delete_tryout_invites(self, codes) -> None:
+        """
+        This function will delete stored tryout and ringer invites.
+
+        :param codes: The codes of the invites.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.executemany("DELETE FROM tryout_invites WHERE code = ?", [(code,) for code in codes])
+        await self.commit()
+
+    async def get_unvalidated_tryout_invites(self, before: float) -> list[str]:
+        """
+        This function will get the tryout and ringer invites that were not validated since the given time.
+
+        :param before: The UNIX timestamp invites validated at or after are left out.
+        :return: The codes of the invites.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT code FROM tryout_invites WHERE validated_at IS NULL OR validated_at < ?", (before,)
+            )
+            return [row[0] for row in await cursor.fetchall()]
+
+    async def set_tryout_invite_validated(self, code: str, validated_at: float) -> None:
+        """
+        This function will record when a tryout or ringer invite was last found to still exist.
+
+        :param code: The code of the invite.
+        :param validated_at: The UNIX timestamp of the validation.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.execute("UPDATE tryout_invites SET validated_at = ? WHERE code = ?", (validated_at, code))
+        await self.commit()
+
+    async def import_tryout_invites(self, path: str, expires_at: float) -> int:
+        """
+        This function will import the invites of the legacy tryout_invites.json file, once.
+
+        The file does not know when its invites expire, so they all get the given expiry time. The file is renamed to
+        `<path>.imported` afterwards so it is not imported again.
+
+        :param path: The path to the tryout_invites.json file.
+        :param expires_at: The UNIX timestamp the imported invites expire at.
+        :return: The number of imported invites.
+        """
+        if not os.path.isfile(path):
+            return 0
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except json.JSONDecodeError:
+            data = {}
+
+        async with self._write_cursor() as cursor:
+            await cursor.executemany(
+                "INSERT OR IGNORE INTO tryout_invites (code, role_name, expires_at) VALUES (?, ?, ?)",
+                [(code, role_name, expires_at) for code, role_name in data.items()]
+            )
+        await self.commit()
+        os.replace(path, f"{path}.imported")
+        return len(data)
+
+    async def add_webhook_message(self, payload: str) -> None:
+        """
+        This function will queue a webhook message for delivery.
+
+        :param payload: The JSON encoded webhook message.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.execute("INSERT INTO webhook_queue (payload) VALUES (?)", (payload,))
+        await self.commit()
+
+    async def get_due_webhook_messages(self, now: float, limit: int = 10) -> list:
+        """
+        This function will get the queued webhook messages that are due for delivery, oldest first.
+
+        :param now: The current UNIX timestamp.
+        :param limit: The maximum number of messages to get.
+        :return: A list of (id, payload, attempts) rows.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT id, payload, attempts FROM webhook_queue WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit)
+            )
+            return await cursor.fetchall()
+
+    async def get_next_webhook_attempt(self) -> float | None:
+        """
+        This function will get when the next queued webhook message is due.
+
+        :return: The UNIX timestamp of the next delivery attempt, None if the queue is empty.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute("SELECT MIN(next_attempt_at) FROM webhook_queue")
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+    async def reschedule_webhook_messages(self, ids, next_attempt_at: float, attempted: bool = True) -> None:
+        """
+        This function will postpone the delivery of queued webhook messages.
+
+        :param ids: The IDs of the queued messages.
+        :param next_attempt_at: The UNIX timestamp of the next delivery attempt.
+        :param attempted: Whether the failed delivery counts as an attempt.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.executemany(
+                "UPDATE webhook_queue SET next_attempt_at = ?, attempts = attempts + ? WHERE id = ?",
+                [(next_attempt_at, int(attempted), message_id) for message_id in ids]
+            )
+        await self.commit()
+
+    async def delete_webhook_messages(self, ids) -> None:
+        """
+        This function will remove delivered or dropped webhook messages from the queue.
+
+        :param ids: The IDs of the queued messages.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.executemany("DELETE FROM webhook_queue WHERE id = ?", [(message_id,) for message_id in ids])
+        await self.commit()
+
+    async def get_twitter_checkpoint(self, account: str):
+        """
+        This function will get where the timeline poller stopped reading an account.
+
+        :param account: The screen name of the account.
+        :return: The (etag, last_modified, last_seen_id) row of the account, None if it was never polled.
+        """
+        async with self._read_cursor() as cursor:
+            await cursor.execute(
+                "SELECT etag, last_modified, last_seen_id FROM twitter_checkpoints WHERE account = ?", (account,)
+            )
+            return await cursor.fetchone()
+
+    async def set_twitter_checkpoint(self, account: str, etag: str = None, last_modified: str = None,
+                                     last_seen_id: int = None) -> None:
+        """
+        This function will store where the timeline poller stopped reading an account.
+
+        :param account: The screen name of the account.
+        :param etag: The ETag of the last timeline response.
+        :param last_modified: The Last-Modified header of the last timeline response.
+        :param last_seen_id: The ID of the newest tweet seen.
+        """
+        async with self._write_cursor() as cursor:
+            await cursor.execute(
+                "INSERT OR REPLACE INTO twitter_checkpoints (account, etag, last_modified, last_seen_id) "
+                "VALUES (?, ?, ?, ?)",
+                (account, etag, last_modified, last_seen_id)
+            )
+        await self.commit()
 
     async def get_player(self, player_id: int):
-        async with self.connection.cursor() as cursor:
+        async with self._read_cursor() as cursor:
             await cursor.execute("SELECT * FROM players WHERE player_id = ?", (player_id,))
             return await cursor.fetchone()
 
     async def get_players(self, team_name: str):
-        async with self.connection.cursor() as cursor:
-            await cursor.execute("SELECT * FROM players WHERE team_name = ?", (team_name,))
-            return await cursor.fetchall()
+        snapshot = await self.get_roster(team_name)
+        return list(snapshot.players) if snapshot else []
@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS `idx_players_team_name_role` ON `players` (`team_name`, `role`);
+CREATE INDEX IF NOT EXISTS `idx_players_player_id` ON `players` (`player_id`);
+CREATE INDEX IF NOT EXISTS `idx_warns_user_id_server_id_id` ON `warns` (`user_id`, `server_id`, `id`);
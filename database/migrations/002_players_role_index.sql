@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS `idx_players_role_player_id` ON `players` (`role`, `player_id`, `team_name`);
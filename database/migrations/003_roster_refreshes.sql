@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS `roster_refreshes` (
+  `team_name` varchar(255) NOT NULL PRIMARY KEY,
+  `refreshed_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `error` varchar(255) NULL
+);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS `roster_messages` (
+  `message_id` INTEGER NOT NULL PRIMARY KEY,
+  `channel_id` int(20) NOT NULL,
+  `roster_key` varchar(255) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS `idx_roster_messages_roster_key` ON `roster_messages` (`roster_key`);
@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS `tryout_invites` (
+  `code` varchar(32) NOT NULL PRIMARY KEY,
+  `role_name` varchar(255) NOT NULL,
+  `expires_at` real NULL
+);
@@ -0,0 +1 @@
+ALTER TABLE `tryout_invites` ADD COLUMN `validated_at` real NULL;
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS `webhook_queue` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `payload` text NOT NULL,
+  `attempts` int NOT NULL DEFAULT 0,
+  `next_attempt_at` real NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS `idx_webhook_queue_next_attempt_at` ON `webhook_queue` (`next_attempt_at`, `id`);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS `twitter_checkpoints` (
+  `account` varchar(255) NOT NULL PRIMARY KEY,
+  `etag` text NULL,
+  `last_modified` text NULL,
+  `last_seen_id` int NULL
+);
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS `idx_tryout_invites_validated_at` ON `tryout_invites` (`validated_at`);
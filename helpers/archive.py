@@ -0,0 +1,235 @@
+import gzip
+import html
+import json
+import tempfile
+
+import discord
+
+# Parts are kept in memory up to this size before they are moved to a temporary file
+SPOOL_SIZE = 8 * 1024 * 1024
+# Room left for the data the compressor still buffers when the size of a part is checked
+PART_MARGIN = 512 * 1024
+
+
+class ArchiveWriter:
+    """
+    Compresses an archive on the fly into gzip parts that each fit in one upload.
+
+    A part is started with the header and closed with the footer, so every part can be read on its own. Finished parts
+    are handed back as soon as they are full, so they can be uploaded while the rest of the archive is written.
+    """
+
+    def __init__(self, name: str, extension: str, max_size: int, header: str = "", footer: str = "") -> None:
+        self.name = name
+        self.extension = extension
+        self.max_size = max_size
+        self.header = header
+        self.footer = footer
+        self.parts = 0
+        self.size = 0
+        self._spool = None
+        self._gzip = None
+
+    def write(self, text: str) -> discord.File | None:
+        """
+        Write text to the archive, starting a new part if the current one is full.
+
+        :param text: The text to write.
+        :return: The previous part if it was finished by this write, None otherwise.
+        """
+        finished = None
+        if self._gzip is not None and self._spool.tell() + PART_MARGIN >= self.max_size:
+            finished = self._finish()
+        if self._gzip is None:
+            self._start()
+        data = text.encode("utf-8")
+        self._gzip.write(data)
+        self.size += len(data)
+        return finished
+
+    def close(self) -> discord.File | None:
+        """
+        Finish the archive.
+
+        :return: The last part, None if nothing was written.
+        """
+        if self._gzip is None:
+            return None
+        return self._finish()
+
+    def _start(self) -> None:
+        self.parts += 1
+        self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        self._gzip = gzip.GzipFile(filename=self._filename(), mode="wb", fileobj=self._spool)
+        if self.header:
+            self._gzip.write(self.header.encode("utf-8"))
+
+    def _finish(self) -> discord.File:
+        if self.footer:
+            self._gzip.write(self.footer.encode("utf-8"))
+        self._gzip.close()
+        self._spool.seek(0)
+        file = discord.File(self._spool, filename=f"{self._filename()}.gz")
+        self._gzip = None
+        self._spool = None
+        return file
+
+    def _filename(self) -> str:
+        return f"{self.name}-{self.parts}.{self.extension}"
+
+
+class TextFormat:
+    """
+    The plain text archive, one line per message.
+    """
+
+    extension = "log"
+
+    @staticmethod
+    def header(channel, title: str) -> str:
+        return f"{title}\n"
+
+    @staticmethod
+    def message(message: discord.Message) -> str:
+        attachments = [attachment.url for attachment in message.attachments]
+        attachments_text = (
+            f"[Attached File{'s' if len(attachments) >= 2 else ''}: {', '.join(attachments)}]"
+            if len(attachments) >= 1
+            else ""
+        )
+        return (f"{message.created_at.strftime('%d.%m.%Y %H:%M:%S')} {message.author} {message.id}: "
+                f"{message.clean_content} {attachments_text}\n")
+
+    @staticmethod
+    def footer() -> str:
+        return ""
+
+
+class JsonlFormat:
+    """
+    The JSON Lines archive, one JSON object per message, which can be imported again.
+    """
+
+    extension = "jsonl"
+
+    @staticmethod
+    def header(channel, title: str) -> str:
+        return ""
+
+    @staticmethod
+    def message(message: discord.Message) -> str:
+        return json.dumps({
+            "id": message.id,
+            "channel_id": message.channel.id,
+            "guild_id": message.guild.id if message.guild else None,
+            "author": {
+                "id": message.author.id,
+                "name": str(message.author),
+                "display_name": message.author.display_name,
+                "bot": message.author.bot,
+            },
+            "created_at": message.created_at.isoformat(),
+            "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+            "type": message.type.name,
+            "content": message.content,
+            "reference_id": message.reference.message_id if message.reference else None,
+            "attachments": [attachment_manifest(attachment) for attachment in message.attachments],
+            "embeds": [embed.to_dict() for embed in message.embeds],
+        }, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def footer() -> str:
+        return ""
+
+
+class HtmlFormat:
+    """
+    The HTML transcript, which only needs a browser to be read.
+    """
+
+    extension = "html"
+
+    @staticmethod
+    def header(channel, title: str) -> str:
+        return (
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>#{html.escape(str(channel))}</title>\n"
+            "<style>\n"
+            "body { background: #313338; color: #dbdee1; font-family: sans-serif; margin: 2em; }\n"
+            ".message { padding: 0.4em 0; border-bottom: 1px solid #3f4147; }\n"
+            ".author { font-weight: bold; color: #f2f3f5; }\n"
+            ".meta { color: #949ba4; font-size: 0.8em; margin-left: 0.5em; }\n"
+            ".content { white-space: pre-wrap; margin-top: 0.2em; }\n"
+            ".embed { border-left: 4px solid #1e1f22; background: #2b2d31; padding: 0.5em; margin-top: 0.3em; }\n"
+            "a { color: #00a8fc; }\n"
+            "</style>\n</head>\n<body>\n"
+            f"<h1>{html.escape(title)}</h1>\n"
+        )
+
+    @staticmethod
+    def message(message: discord.Message) -> str:
+        parts = [
+            f'<div class="message" id="{message.id}">',
+            f'<span class="author">{html.escape(str(message.author))}</span>'
+            f'<span class="meta">{message.created_at.strftime("%d.%m.%Y %H:%M:%S")} - {message.id}'
+            f'{" (edited)" if message.edited_at else ""}</span>',
+        ]
+        if message.reference and message.reference.message_id:
+            parts.append(f'<div class="meta">Reply to <a href="#{message.reference.message_id}">'
+                         f'{message.reference.message_id}</a></div>')
+        if message.clean_content:
+            parts.append(f'<div class="content">{html.escape(message.clean_content)}</div>')
+        for attachment in message.attachments:
+            parts.append(f'<div>Attachment: <a href="{html.escape(attachment.url)}">'
+                         f'{html.escape(attachment.filename)}</a> ({attachment.size} bytes)</div>')
+        for embed in message.embeds:
+            style = f' style="border-color: {embed.color}"' if embed.color else ""
+            embed_parts = [f'<div class="embed"{style}>']
+            if embed.author.name:
+                embed_parts.append(f'<div class="author">{html.escape(embed.author.name)}</div>')
+            if embed.title:
+                title = html.escape(embed.title)
+                if embed.url:
+                    title = f'<a href="{html.escape(embed.url)}">{title}</a>'
+                embed_parts.append(f"<div><b>{title}</b></div>")
+            if embed.description:
+                embed_parts.append(f'<div class="content">{html.escape(embed.description)}</div>')
+            for field in embed.fields:
+                embed_parts.append(f'<div><b>{html.escape(str(field.name))}</b></div>'
+                                   f'<div class="content">{html.escape(str(field.value))}</div>')
+            if embed.image.url:
+                embed_parts.append(f'<div>Image: <a href="{html.escape(embed.image.url)}">'
+                                   f'{html.escape(embed.image.url)}</a></div>')
+            if embed.footer.text:
+                embed_parts.append(f'<div class="meta">{html.escape(embed.footer.text)}</div>')
+            embed_parts.append("</div>")
+            parts.append("".join(embed_parts))
+        parts.append("</div>\n")
+        return "".join(parts)
+
+    @staticmethod
+    def footer() -> str:
+        return "</body>\n</html>\n"
+
+
+FORMATS = {
+    "text": TextFormat,
+    "jsonl": JsonlFormat,
+    "html": HtmlFormat,
+}
+
+
+def attachment_manifest(attachment: discord.Attachment) -> dict:
+    """
+    Describe an attachment, so it can be downloaded again while its URL is valid.
+
+    :param attachment: The attachment.
+    :return: The ID, file name, URL, size and content type of the attachment.
+    """
+    return {
+        "id": attachment.id,
+        "filename": attachment.filename,
+        "url": attachment.url,
+        "size": attachment.size,
+        "content_type": attachment.content_type,
+    }
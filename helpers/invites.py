@@ -0,0 +1,249 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Iterable
+
+import discord
+
+logger = logging.getLogger("discord_bot")
+
+
+class InviteTracker:
+    """
+    Keeps the invites of every guild, keyed by code, to find out which invite a new member joined with.
+
+    The cache is kept current from the invite create and delete events, so the only invite fetch left is the one
+    made when members join. Joins are attributed in rounds, one round at a time per guild: the joins that arrive while
+    a round fetches the invites wait for the next round and share its single fetch, so a burst of N joins costs a
+    couple of fetches instead of N.
+
+    Discord does not tell which member used which invite, so a round is only attributed when it is unambiguous: every
+    use since the previous round is of the same invite and there is a use for every join. Otherwise every join of the
+    round gets None, so nobody is given the role of an invite someone else used. Uses that no join of the round
+    claimed are carried over to the next round when joins are already waiting for it, since they were most likely made
+    by those joins.
+    """
+
+    def __init__(self) -> None:
+        self._invites: dict[int, dict[str, discord.Invite]] = {}
+        # The uses of every invite that were attributed to a join, or that happened before the invite was cached
+        self._uses: dict[int, dict[str, int]] = {}
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+        self._rounds: dict[int, asyncio.Task] = {}
+        self.fetches = 0
+
+    async def load(self, guild: discord.Guild) -> None:
+        """
+        Fetch and cache every invite of a guild.
+
+        :param guild: The guild to cache the invites of.
+        """
+        invites = await guild.invites()
+        self._invites[guild.id] = {invite.code: invite for invite in invites}
+        self._uses[guild.id] = {invite.code: invite.uses or 0 for invite in invites}
+
+    def add(self, invite: discord.Invite) -> None:
+        if invite.guild is not None:
+            self._invites.setdefault(invite.guild.id, {})[invite.code] = invite
+            self._uses.setdefault(invite.guild.id, {})[invite.code] = invite.uses or 0
+
+    def remove(self, invite: discord.Invite) -> None:
+        if invite.guild is not None:
+            self._invites.get(invite.guild.id, {}).pop(invite.code, None)
+            self._uses.get(invite.guild.id, {}).pop(invite.code, None)
+
+    async def find_used_invite(self, guild: discord.Guild, codes: Iterable[str]) -> discord.Invite | None:
+        """
+        Find which of the given invites was just used to join a guild.
+
+        :param guild: The guild that was joined.
+        :param codes: The invite codes to look for, other invites are ignored.
+        :return: The used invite, or None if none of the given invites was used or the join cannot be told apart from
+            other joins that used different invites.
+        """
+        codes = set(codes)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(guild.id, []).append(future)
+        if guild.id not in self._rounds:
+            self._rounds[guild.id] = asyncio.create_task(self._attribute(guild))
+
+        invite = await future
+        return invite if invite is not None and invite.code in codes else None
+
+    async def _attribute(self, guild: discord.Guild) -> None:
+        waiters = []
+        try:
+            while self._waiters.get(guild.id):
+                waiters = self._waiters.pop(guild.id)
+                try:
+                    self.fetches += 1
+                    current = {invite.code: invite for invite in await guild.invites()}
+                except Exception as e:
+                    for future in waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self._attribute_round(guild, waiters, current)
+        finally:
+            self._rounds.pop(guild.id, None)
+            # Only left unresolved when the round was cancelled
+            for future in waiters:
+                future.cancel()
+
+    def _attribute_round(self, guild: discord.Guild, waiters: list, current: dict[str, discord.Invite]) -> None:
+        cached = self._invites.get(guild.id, {})
+        uses = self._uses.get(guild.id, {})
+
+        # Every use since the previous round, one entry per use
+        used = []
+        for code, invite in current.items():
+            used.extend([invite] * max((invite.uses or 0) - uses.get(code, 0), 0))
+        # An invite that reached its maximum uses is deleted by Discord before we can fetch it
+        for code, previous in cached.items():
+            if code not in current and previous.max_uses and uses.get(code, 0) + 1 >= previous.max_uses:
+                used.append(previous)
+
+        used_codes = {invite.code for invite in used}
+        attributed = {}
+        if len(used_codes) > 1 or 0 < len(used) < len(waiters):
+            logger.warning(f"{len(waiters)} join(s) in {guild} used {len(used)} invite use(s) of {len(used_codes)} "
+                           f"different invite(s) at once, the joins were not attributed")
+            # The joins of the round made the uses even though nobody knows which, they are not carried over
+            for invite in used:
+                attributed[invite.code] = attributed.get(invite.code, 0) + 1
+            used = []
+        elif used:
+            attributed[used[0].code] = len(waiters)
+
+        for future in waiters:
+            # A join whose handler was cancelled still used its invite
+            if not future.done():
+                future.set_result(used[0] if used else None)
+
+        self._invites[guild.id] = current
+        if self._waiters.get(guild.id):
+            # The uses nobody claimed are most likely from the joins waiting for the next round
+            self._uses[guild.id] = {code: uses.get(code, 0) + attributed.get(code, 0) for code in current}
+        else:
+            self._uses[guild.id] = {code: invite.uses or 0 for code, invite in current.items()}
+
+
+class TryoutInviteStore:
+    """
+    Keeps the role granted by every tryout and ringer invite in memory, backed by the `tryout_invites` table.
+
+    Expiry times are kept in a min-heap, so expired invites are dropped locally without asking Discord about each
+    code. Heap entries of invites that were already removed are skipped when they come up.
+    """
+
+    def __init__(self, database) -> None:
+        self.database = database
+        self._roles: dict[str, str] = {}
+        self._expiry: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    async def load(self) -> None:
+        """
+        Load every stored invite from the database.
+        """
+        self._roles.clear()
+        self._expiry.clear()
+        for code, role_name, expires_at in await self.database.get_tryout_invites():
+            self._roles[code] = role_name
+            if expires_at is not None:
+                self._expiry.append((expires_at, code))
+        heapq.heapify(self._expiry)
+
+    def codes(self) -> Iterable[str]:
+        return self._roles.keys()
+
+    def get(self, code: str) -> str | None:
+        return self._roles.get(code)
+
+    async def add(self, code: str, role_name: str, expires_at: datetime | None) -> None:
+        """
+        Store the role an invite grants.
+
+        :param code: The code of the invite.
+        :param role_name: The name of the role given to members joining with the invite.
+        :param expires_at: When the invite expires, None if it never expires.
+        """
+        timestamp = expires_at.timestamp() if expires_at is not None else None
+        self._roles[code] = role_name
+        if timestamp is not None:
+            heapq.heappush(self._expiry, (timestamp, code))
+        await self.database.add_tryout_invite(code, role_name, timestamp)
+
+    async def remove(self, code: str) -> None:
+        if self._roles.pop(code, None) is not None:
+            await self.database.delete_tryout_invites([code])
+
+    async def expire(self, now: float = None) -> int:
+        """
+        Drop every invite that has expired.
+
+        :param now: The current UNIX timestamp, defaults to the current time.
+        :return: The number of dropped invites.
+        """
+        now = time.time() if now is None else now
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            _, code = heapq.heappop(self._expiry)
+            if self._roles.pop(code, None) is not None:
+                expired.append(code)
+        if expired:
+            await self.database.delete_tryout_invites(expired)
+        return len(expired)
+
+    async def validate(self, bot, concurrency: int = 5, interval: float = 604800, max_retries: int = 5) -> None:
+        """
+        Drop the invites Discord no longer knows about, checking several codes at once.
+
+        Every code that still exists gets its validation time stored, so a sweep that is interrupted picks up with
+        the codes it did not check yet and codes checked within `interval` are skipped.
+
+        :param bot: The bot to fetch the invites with.
+        :param concurrency: The maximum number of invites fetched at once.
+        :param interval: The number of seconds a validation is trusted for.
+        :param max_retries: The number of times a rate limited fetch is retried.
+        """
+        started = time.time()
+        codes = [code for code in await self.database.get_unvalidated_tryout_invites(started - interval)
+                 if code in self._roles]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check(code: str) -> bool:
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        await bot.fetch_invite(code, with_counts=False)
+                    except discord.NotFound:
+                        return False
+                    except discord.HTTPException as e:
+                        if e.status != 429 or attempt == max_retries:
+                            raise
+                        retry_after = e.response.headers.get("Retry-After")
+                        await asyncio.sleep(float(retry_after) if retry_after else 2 ** attempt)
+                        continue
+                    await self.database.set_tryout_invite_validated(code, time.time())
+                    return True
+
+        results = await asyncio.gather(*(check(code) for code in codes), return_exceptions=True)
+
+        expired = [code for code, result in zip(codes, results) if result is False]
+        for code in expired:
+            self._roles.pop(code, None)
+        if expired:
+            await self.database.delete_tryout_invites(expired)
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.warning(f"Could not validate a tryout invite: {error}")
+        logger.info(
+            f"Validated {len(codes)} tryout invite(s) in {time.time() - started:.1f}s: {len(expired)} expired, "
+            f"{len(errors)} failed"
+        )
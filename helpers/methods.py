@@ -3,7 +3,7 @@ import os
 import sys
 import discord
 
-from typing import Optional
+from typing import Iterable, Optional
 from database import DatabaseManager
 
 database: Optional[DatabaseManager] = None
@@ -53,3 +53,60 @@ async def team_affiliation(member: discord.Member) -> str:
             return "Team does not exist."
     else:
         return "Sorry, you need to specify your team."
+
+
+def get_players_embed(guild: discord.Guild, team_status: bool, color: str, players: Iterable[tuple]) -> list[discord.Embed]:
+    roles_order = [
+        ("Staff", ["Head Coach", "Assistant Coach", "Manager"]),
+        ("Players", ["Main Tank", "Off Tank", "Hitscan DPS", "Flex DPS", "Main Support", "Flex Support"]),
+        ("Substitute", ["Substitute"])
+    ]
+
+    emojis = {
+        "Head Coach": "<:HeadCoach:1159488503437078598>",
+        "Assistant Coach": "<:AHC:1159488404950622218>",
+        "Manager": "<:manager:1159872594502242375>",
+        "Main Tank": "<:tank:1159871555128537241>",
+        "Off Tank": "<:offtank:1159872063322988657>",
+        "Hitscan DPS": "<:hitscan:1159872249843699734>",
+        "Flex DPS": "<:flexdps:1159871979315282000>",
+        "Main Support": "<:mainsupport:1159871872842866828>",
+        "Flex Support": "<:flexsupport:1159871932099989595>",
+        "Substitute": "<:sub:1159872018150338661>"
+    }
+
+    roster_dict = {}
+    for _, role_group in roles_order:
+        for role in role_group:
+            roster_dict[role] = []
+
+    for player in players:
+        player_id, role = player[0], player[2]
+        member = guild.get_member(player_id)
+        if member:
+            username = member.name
+            mention = member.mention
+            roster_dict[role].append(f"{mention} - `{username}`")
+
+    embeds = []
+    for category, role_group in roles_order:
+        description_str = ""
+        for role in role_group:
+            emoji = emojis.get(role, "")
+            title = f"{emoji} {role}"
+            if roster_dict[role]:
+                for username in roster_dict[role]:
+                    description_str += f"**{title}:** {username}\n"
+            else:
+                if team_status:
+                    description_str += f"**{title}:** *Trialing*\n"
+                else:
+                    pass
+        if description_str:
+            embed = discord.Embed(
+                description=description_str,
+                color=discord.Color.from_str(color)
+            )
+            embeds.append(embed)
+
+    return embeds
@@ -0,0 +1,217 @@
+import bisect
+import functools
+import inspect
+import logging
+import time
+
+from aiohttp import web
+
+logger = logging.getLogger("discord_bot")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, le: str = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label set: the count of every bucket, the sum and the total count
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (bucket_counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, bound)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, '+Inf')} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class _RateLimitHandler(logging.Handler):
+    """
+    Counts the rate limit waits discord.py logs when a request is answered with a 429.
+    """
+
+    def __init__(self, metrics: "BotMetrics") -> None:
+        super().__init__(logging.WARNING)
+        self.metrics = metrics
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not isinstance(record.msg, str) or not record.msg.startswith("We are being rate limited.") \
+                or not record.args:
+            return
+        retry_after = record.args[-1]
+        if isinstance(retry_after, (int, float)):
+            self.metrics.rate_limit_waits.inc(record.args[0])
+            self.metrics.rate_limit_wait_seconds.inc(record.args[0], amount=retry_after)
+
+
+class BotMetrics:
+    """
+    Records command, REST and database metrics and serves them in the Prometheus text format on `/metrics`.
+    """
+
+    def __init__(self) -> None:
+        self.command_seconds = Histogram(
+            "bot_command_duration_seconds", "Time from invoking a command to its completion or error.",
+            ("command", "outcome")
+        )
+        self.command_errors = Counter(
+            "bot_command_errors_total", "Command errors by exception type.", ("command", "error")
+        )
+        self.rest_requests = Counter(
+            "bot_rest_requests_total", "Discord REST requests by route and status.", ("method", "route", "status")
+        )
+        self.rest_seconds = Histogram(
+            "bot_rest_request_duration_seconds", "Discord REST request time, rate limit waits included.",
+            ("method", "route")
+        )
+        self.rate_limit_waits = Counter(
+            "bot_rate_limit_waits_total", "Discord REST requests retried after a 429 response.", ("method",)
+        )
+        self.rate_limit_wait_seconds = Counter(
+            "bot_rate_limit_wait_seconds_total", "Time spent waiting on 429 responses.", ("method",)
+        )
+        self.db_query_seconds = Histogram(
+            "bot_db_query_duration_seconds", "Database method time.", ("method",)
+        )
+        self.metrics = [
+            self.command_seconds, self.command_errors, self.rest_requests, self.rest_seconds,
+            self.rate_limit_waits, self.rate_limit_wait_seconds, self.db_query_seconds,
+        ]
+        self._runner = None
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def command_started(self, context) -> None:
+        context.metrics_started_at = time.perf_counter()
+
+    def command_finished(self, context, error: Exception = None) -> None:
+        command = context.command.qualified_name if context.command else "unknown"
+        if error is not None:
+            # Report the error raised by the command itself rather than its wrapper
+            original = getattr(error, "original", error)
+            self.command_errors.inc(command, type(original).__name__)
+        started_at = getattr(context, "metrics_started_at", None)
+        if started_at is not None:
+            self.command_seconds.observe(time.perf_counter() - started_at, command, "error" if error else "success")
+
+    def instrument_http(self, http) -> None:
+        """
+        Count and time every REST request the bot makes.
+
+        :param http: The HTTP client of the bot.
+        """
+        request = http.request
+
+        @functools.wraps(request)
+        async def timed_request(route, **kwargs):
+            started_at = time.perf_counter()
+            status = "ok"
+            try:
+                return await request(route, **kwargs)
+            except Exception as e:
+                status = str(getattr(e, "status", type(e).__name__))
+                raise
+            finally:
+                self.rest_requests.inc(route.method, route.path, status)
+                self.rest_seconds.observe(time.perf_counter() - started_at, route.method, route.path)
+
+        http.request = timed_request
+        logging.getLogger("discord.http").addHandler(_RateLimitHandler(self))
+
+    def instrument_database(self, database) -> None:
+        """
+        Time every public coroutine method of the database manager.
+
+        :param database: The database manager.
+        """
+        for name, method in inspect.getmembers(database, inspect.iscoroutinefunction):
+            if name.startswith("_") or name in ("connect", "close"):
+                continue
+            setattr(database, name, self._timed(name, method))
+
+    def _timed(self, name: str, method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.db_query_seconds.observe(time.perf_counter() - started_at, name)
+
+        return timed
+
+    async def start(self, host: str, port: int) -> None:
+        """
+        Serve the metrics on `http://<host>:<port>/metrics`.
+
+        :param host: The address to listen on.
+        :param port: The port to listen on.
+        """
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
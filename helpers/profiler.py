@@ -0,0 +1,122 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from typing import Hashable
+
+ROOT_PATH = os.path.realpath(f"{os.path.realpath(os.path.dirname(__file__))}/..")
+PROFILED_PATHS = (f"{ROOT_PATH}{os.sep}cogs{os.sep}", f"{ROOT_PATH}{os.sep}database{os.sep}")
+
+
+class Profiler:
+    """
+    Profiles the running bot with cProfile for a bounded time or number of commands, and diffs tracemalloc snapshots.
+
+    Only one profile runs at a time. The report of a profile that stopped by itself is kept until it is collected.
+    """
+
+    def __init__(self) -> None:
+        self._profile = None
+        self._timer = None
+        self._commands_left = None
+        # The commands that started while profiling, the command that started the profile is not one of them
+        self._commands = set()
+        self.report = None
+        self._snapshot = None
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self, duration: float = None, commands: int = None) -> None:
+        """
+        Start profiling.
+
+        :param duration: The number of seconds to stop profiling after.
+        :param commands: The number of commands started after this call to stop profiling after.
+        """
+        self.report = None
+        self._profile = cProfile.Profile()
+        self._commands_left = commands
+        self._commands.clear()
+        if duration is not None:
+            self._timer = asyncio.get_running_loop().call_later(duration, self.stop)
+        self._profile.enable()
+
+    def stop(self) -> str | None:
+        """
+        Stop profiling.
+
+        :return: The report of the profile, or of the last profile if it already stopped by itself.
+        """
+        if self._profile is not None:
+            self._profile.disable()
+            self.report = self._format(self._profile)
+            self._profile = None
+            self._commands.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self.report
+
+    def command_started(self, context: Hashable) -> None:
+        if self._profile is not None and self._commands_left is not None:
+            self._commands.add(context)
+
+    def command_finished(self, context: Hashable) -> None:
+        if context not in self._commands:
+            return
+        self._commands.discard(context)
+        self._commands_left -= 1
+        if self._commands_left <= 0:
+            self.stop()
+
+    @staticmethod
+    def _format(profile: cProfile.Profile, limit: int = 50) -> str:
+        stats = pstats.Stats(profile)
+        rows = []
+        for (filename, line, function), (_, calls, total_time, cumulative_time, _) in stats.stats.items():
+            if filename.startswith(PROFILED_PATHS):
+                location = f"{os.path.relpath(filename, ROOT_PATH)}:{line}({function})"
+                rows.append((cumulative_time, total_time, calls, location))
+        rows.sort(reverse=True)
+
+        output = io.StringIO()
+        output.write(f"{'cumtime':>10} {'tottime':>10} {'calls':>8}  function\n")
+        for cumulative_time, total_time, calls, location in rows[:limit]:
+            output.write(f"{cumulative_time:>10.4f} {total_time:>10.4f} {calls:>8}  {location}\n")
+        output.write(f"\n{len(rows)} functions in cogs/ and database/, {stats.total_calls} calls in total, "
+                     f"{stats.total_tt:.3f}s profiled\n")
+        return output.getvalue()
+
+    def diff_allocations(self, limit: int = 30) -> str:
+        """
+        Compare the allocations with the previous call, tracemalloc is started on the first call.
+
+        :param limit: The number of allocation sites to report.
+        :return: The allocation sites that grew the most since the previous call.
+        """
+        if not tracemalloc.is_tracing() or self._snapshot is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._snapshot = self._take_snapshot()
+            return "Started tracing allocations, dump again to see which allocations grew.\n"
+
+        snapshot = self._take_snapshot()
+        previous, self._snapshot = self._snapshot, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+
+        output = io.StringIO()
+        output.write(f"Traced memory: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n\n")
+        for stat in snapshot.compare_to(previous, "lineno")[:limit]:
+            output.write(f"{stat}\n")
+        return output.getvalue()
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
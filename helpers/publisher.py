@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+import discord
+
+logger = logging.getLogger("discord_bot")
+
+
+def fingerprint(embeds: list[discord.Embed]) -> str:
+    """
+    Get a stable hash of the payload Discord receives for the given embeds.
+
+    :param embeds: The rendered embeds.
+    :return: The hex digest of the embeds payload.
+    """
+    payload = json.dumps([embed.to_dict() for embed in embeds], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RosterPublisher:
+    """
+    Edits every stored message of a roster, skipping the messages that already show the rendered embeds.
+
+    The messages of a roster are edited concurrently, up to `max_concurrency` edits at once and one at a time per
+    channel since Discord rate limits message edits per channel. Edits go through cached partial messages, so no
+    message has to be fetched first.
+    """
+
+    def __init__(self, bot, max_concurrency: int = 5) -> None:
+        self.bot = bot
+        self.fingerprints: dict[int, str] = {}
+        self.edits_skipped = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._channel_locks: dict[int, asyncio.Lock] = {}
+        self._partial_messages: dict[int, discord.PartialMessage] = {}
+
+    async def publish(self, roster_key: str, new_embeds: list[discord.Embed] | discord.Embed) -> int:
+        """
+        Update the stored messages of a roster with new embeds.
+
+        :param roster_key: The roster the messages belong to, a team name, "coaches" or "staff".
+        :param new_embeds: The embeds the messages should show.
+        :return: The number of edits that were skipped because the message was already up-to-date.
+        """
+        embeds = new_embeds if isinstance(new_embeds, list) else [new_embeds]
+        digest = fingerprint(embeds)
+
+        messages = await self.bot.database.get_roster_messages(roster_key)
+        if not messages:
+            logger.warning(f"Roster {roster_key} has no stored messages.")
+            return 0
+
+        stale = [(message_id, channel_id) for message_id, channel_id in messages
+                 if self.fingerprints.get(message_id) != digest]
+        skipped = len(messages) - len(stale)
+        results = await asyncio.gather(
+            *(self._edit(channel_id, message_id, embeds, digest) for message_id, channel_id in stale),
+            return_exceptions=True,
+        )
+
+        # Stop tracking the messages that were not found
+        missing = [message_id for (message_id, _), result in zip(stale, results) if result is False]
+        if missing:
+            await self.bot.database.delete_roster_messages(missing)
+
+        if skipped:
+            self.edits_skipped += skipped
+            logger.info(f"Skipped {skipped} unchanged {roster_key} roster message(s), {self.edits_skipped} in total")
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            raise errors[0]
+        return skipped
+
+    async def _edit(self, channel_id: int, message_id: int, embeds: list[discord.Embed], digest: str) -> bool | None:
+        message = self._partial_messages.get(message_id)
+        if message is None:
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                logger.warning(f"Channel {channel_id} not found.")
+                return None
+            message = channel.get_partial_message(message_id)
+            self._partial_messages[message_id] = message
+
+        async with self._channel_locks.setdefault(channel_id, asyncio.Lock()), self._semaphore:
+            try:
+                await message.edit(embeds=embeds)
+            except discord.errors.NotFound:
+                logger.warning(f"Message {message_id} not found.")
+                self._partial_messages.pop(message_id, None)
+                self.fingerprints.pop(message_id, None)
+                return False
+
+        self.fingerprints[message_id] = digest
+        return True
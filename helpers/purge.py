@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import discord
+
+logger = logging.getLogger("discord_bot")
+
+# Bulk deletes only accept messages younger than 14 days, the margin covers the time the bulk delete request takes
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_SIZE = 100
+
+
+class Purger:
+    """
+    Deletes the messages of a channel that match a set of filters.
+
+    The history is read newest first. Messages younger than 14 days are deleted in bulk, 100 at a time, and older
+    messages, which cannot be bulk deleted, are deleted one by one every `old_delay` seconds so the deletes stay under
+    the rate limit instead of stalling on it. At most `max_scanned` messages are read, so a rare filter does not read
+    the whole channel. Progress is reported every `progress_interval` seconds.
+    """
+
+    def __init__(self, channel: discord.TextChannel, limit: int, *, author: discord.abc.Snowflake = None,
+                 contains: str = None, has_attachment: bool = None, before: discord.abc.Snowflake = None,
+                 after: discord.abc.Snowflake = None, max_scanned: int = None, old_delay: float = 1.0,
+                 progress_interval: float = 5,
+                 on_progress: Callable[["Purger"], Awaitable[None]] = None) -> None:
+        self.channel = channel
+        self.limit = limit
+        self.author = author
+        self.contains = contains.lower() if contains else None
+        self.has_attachment = has_attachment
+        self.before = before
+        self.after = after
+        self.max_scanned = max_scanned
+        self.old_delay = old_delay
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        self.scanned = 0
+        self.deleted = 0
+        self.bulk_deleted = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of messages deleted per second.
+        """
+        elapsed = self.elapsed
+        return self.deleted / elapsed if elapsed else 0.0
+
+    def matches(self, message: discord.Message) -> bool:
+        """
+        Check if a message matches the filters of the purge.
+
+        :param message: The message to check.
+        :return: True if the message should be deleted.
+        """
+        if self.author is not None and message.author.id != self.author.id:
+            return False
+        if self.contains is not None and self.contains not in message.content.lower():
+            return False
+        if self.has_attachment is not None and bool(message.attachments) != self.has_attachment:
+            return False
+        return True
+
+    async def run(self) -> int:
+        """
+        Delete the matching messages, up to the limit.
+
+        :return: The number of deleted messages.
+        """
+        self.started_at = time.monotonic()
+        last_progress_at = self.started_at
+        batch = []
+        matched = 0
+        try:
+            # history() goes oldest first whenever after is set, the split by age needs the newest messages first
+            async for message in self.channel.history(limit=self.max_scanned, before=self.before, after=self.after,
+                                                      oldest_first=False):
+                self.scanned += 1
+                if self.matches(message):
+                    matched += 1
+                    if message.created_at > self._bulk_cutoff():
+                        batch.append(message)
+                        if len(batch) == BULK_DELETE_SIZE:
+                            await self._delete_batch(batch)
+                    else:
+                        # The history is newest first, every message left is too old for bulk deletes
+                        if batch:
+                            await self._delete_batch(batch)
+                        await self._delete_old(message)
+                if time.monotonic() - last_progress_at >= self.progress_interval:
+                    last_progress_at = time.monotonic()
+                    await self._report()
+                if matched >= self.limit:
+                    break
+            if batch:
+                await self._delete_batch(batch)
+        finally:
+            self.finished_at = time.monotonic()
+        logger.info(f"Purged {self.deleted} message(s) in #{self.channel} ({self.bulk_deleted} in bulk, "
+                    f"{self.failed} failed) after scanning {self.scanned} in {self.elapsed:.1f}s")
+        return self.deleted
+
+    @staticmethod
+    def _bulk_cutoff() -> datetime:
+        return datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+
+    async def _delete_batch(self, batch: list) -> None:
+        # A long scan gives the messages near the 14 days limit time to age past it before their batch is sent
+        cutoff = self._bulk_cutoff()
+        young = [message for message in batch if message.created_at > cutoff]
+        expired = [message for message in batch if message.created_at <= cutoff]
+        batch.clear()
+        if young:
+            try:
+                await self.channel.delete_messages(young)
+                self.deleted += len(young)
+                self.bulk_deleted += len(young)
+            except discord.HTTPException as e:
+                # A message of the batch was already deleted or the batch was rejected, the messages are deleted one by
+                # one instead
+                if not isinstance(e, discord.NotFound):
+                    logger.warning(f"Could not bulk delete {len(young)} message(s) in #{self.channel}: {e}")
+                for message in young:
+                    await self._delete(message)
+        for message in expired:
+            await self._delete_old(message)
+
+    async def _delete_old(self, message: discord.Message) -> None:
+        await self._delete(message)
+        await asyncio.sleep(self.old_delay)
+
+    async def _delete(self, message: discord.Message) -> None:
+        try:
+            await message.delete()
+            self.deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning(f"Could not delete message {message.id} in #{self.channel}: {e}")
+            self.failed += 1
+
+    async def _report(self) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            await self.on_progress(self)
+        except discord.HTTPException as e:
+            logger.warning(f"Could not report the progress of the purge in #{self.channel}: {e}")
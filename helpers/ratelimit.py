@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict, deque
+from typing import Hashable
+
+
+class _Window:
+    __slots__ = ("hits", "cooldown_until", "last_seen")
+
+    def __init__(self, limit: int) -> None:
+        self.hits: deque[tuple[float, Hashable]] = deque(maxlen=limit)
+        self.cooldown_until = 0.0
+        self.last_seen = 0.0
+
+
+class SlidingWindowLimiter:
+    """
+    Counts the messages sent under a key, a channel or user ID for example, within a sliding time window.
+
+    Only timestamps and message references, such as IDs, are kept, at most `limit` of them per key. Keys are kept in least recently used
+    order, so keys that went idle for longer than the window and the cooldown are evicted from the front, as are the
+    oldest keys once there are more than `max_keys`.
+    """
+
+    def __init__(self, limit: int, window: float, cooldown: float = 0.0, max_keys: int = 1024) -> None:
+        self.limit = limit
+        self.window = window
+        self.cooldown = cooldown
+        self.max_keys = max_keys
+        self._windows: OrderedDict[Hashable, _Window] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def hit(self, key: Hashable, message: Hashable, now: float = None) -> tuple[bool, list]:
+        """
+        Record a message sent under a key.
+
+        :param key: The key the message counts towards.
+        :param message: The message, its ID or any other hashable reference to it.
+        :param now: The current monotonic time, defaults to `time.monotonic()`.
+        :return: Whether this message made the key reach its limit, and the messages to delete: every
+        message of the window when the limit is reached, the message itself during the cooldown that follows.
+        """
+        now = time.monotonic() if now is None else now
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window(self.limit)
+        else:
+            self._windows.move_to_end(key)
+        window.last_seen = now
+        self._evict(now)
+
+        if now < window.cooldown_until:
+            return False, [message]
+
+        window.hits.append((now, message))
+        if len(window.hits) == self.limit and now - window.hits[0][0] <= self.window:
+            messages = [hit for _, hit in window.hits]
+            window.hits.clear()
+            window.cooldown_until = now + self.cooldown
+            return True, messages
+        return False, []
+
+    def _evict(self, now: float) -> None:
+        ttl = self.window + self.cooldown
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if len(self._windows) <= self.max_keys and now - window.last_seen <= ttl:
+                break
+            del self._windows[key]
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+import discord
+
+from helpers import methods
+
+logger = logging.getLogger("discord_bot")
+
+
+class RosterRefresher:
+    """
+    Refreshes team roster messages in the background.
+
+    Teams are marked dirty and refreshed when the debounce window that follows the first change ends, so a burst of
+    signings rewrites the roster messages once. At most one refresh per team runs at a time and the outcome of every
+    refresh is recorded in the database.
+    """
+
+    def __init__(self, bot, debounce: float = 2.0) -> None:
+        self.bot = bot
+        self.debounce = debounce
+        self._dirty: dict[str, int] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def enqueue(self, team: str, guild: discord.Guild) -> None:
+        """
+        Mark the roster of a team as outdated, it will be refreshed after the debounce window.
+
+        :param team: The name of the team.
+        :param guild: The guild the roster members are resolved in.
+        """
+        if team is None:
+            return
+        self._dirty[team] = guild.id
+        if team not in self._workers:
+            self._workers[team] = asyncio.create_task(self._worker(team))
+
+    async def refresh(self, team: str, guild: discord.Guild) -> Exception | None:
+        """
+        Refresh the roster of a team right away, replacing any refresh that is still waiting for its window.
+
+        :param team: The name of the team.
+        :param guild: The guild the roster members are resolved in.
+        :return: The error that made the refresh fail, or None.
+        """
+        if team is None:
+            # There is no roster to refresh, nor a team to record the outcome for
+            return LookupError("No team to refresh.")
+        self._dirty.pop(team, None)
+        return await self._refresh(team, guild)
+
+    async def close(self) -> None:
+        for worker in list(self._workers.values()):
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def _worker(self, team: str) -> None:
+        try:
+            while team in self._dirty:
+                await asyncio.sleep(self.debounce)
+                guild_id = self._dirty.pop(team, None)
+                if guild_id is None:
+                    continue
+                guild = self.bot.get_guild(guild_id)
+                if guild is not None:
+                    await self._refresh(team, guild)
+        except Exception as e:
+            logger.exception(f"The {team} roster worker stopped: {type(e).__name__}: {e}")
+        finally:
+            self._workers.pop(team, None)
+
+    async def _refresh(self, team: str, guild: discord.Guild) -> Exception | None:
+        async with self._locks.setdefault(team, asyncio.Lock()):
+            error = None
+            try:
+                roster = await self.bot.database.get_roster(team)
+                if roster is None:
+                    raise LookupError(f"Team {team} doesn't exist.")
+                embeds = methods.get_players_embed(guild, roster.team[4], roster.team[1], roster.players)
+                await self.bot.roster_publisher.publish(team, embeds)
+            except Exception as e:
+                error = e
+                logger.error(f"Failed to refresh the {team} roster: {type(e).__name__}: {e}")
+            await self.bot.database.record_roster_refresh(team, error)
+            return error
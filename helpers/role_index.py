@@ -0,0 +1,77 @@
+import discord
+
+
+class RoleIndex:
+    """
+    Keeps, for every guild, the IDs of the members holding each role name.
+
+    A guild is indexed the first time it is read and is then kept current from member and role events,
+    so looking up the holders of a role costs as much as the number of holders.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: dict[int, dict[str, set[int]]] = {}
+
+    def _get_index(self, guild: discord.Guild) -> dict[str, set[int]]:
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = {}
+            for member in guild.members:
+                for role in member.roles:
+                    index.setdefault(role.name, set()).add(member.id)
+            self._guilds[guild.id] = index
+        return index
+
+    def members(self, guild: discord.Guild, role_name: str) -> list[discord.Member]:
+        """
+        Get the members of a guild that have a role with the given name.
+
+        :param guild: The guild to look in.
+        :param role_name: The name of the role.
+        :return: The members holding the role, in no particular order.
+        """
+        members = []
+        for member_id in self._get_index(guild).get(role_name, ()):
+            member = guild.get_member(member_id)
+            if member is not None:
+                members.append(member)
+        return members
+
+    def add_member(self, member: discord.Member) -> None:
+        index = self._guilds.get(member.guild.id)
+        if index is None:
+            return  # The guild will be indexed with this member on its first read
+        for role in member.roles:
+            index.setdefault(role.name, set()).add(member.id)
+
+    def remove_member(self, member: discord.Member) -> None:
+        index = self._guilds.get(member.guild.id)
+        if index is None:
+            return
+        for role in member.roles:
+            holders = index.get(role.name)
+            if holders is not None:
+                holders.discard(member.id)
+
+    def update_member(self, before: discord.Member, after: discord.Member) -> None:
+        index = self._guilds.get(after.guild.id)
+        if index is None or before.roles == after.roles:
+            return
+        before_names = {role.name for role in before.roles}
+        after_names = {role.name for role in after.roles}
+        for role_name in before_names - after_names:
+            holders = index.get(role_name)
+            if holders is not None:
+                holders.discard(after.id)
+        for role_name in after_names - before_names:
+            index.setdefault(role_name, set()).add(after.id)
+
+    def invalidate(self, guild: discord.Guild) -> None:
+        """
+        Drop the index of a guild, it is rebuilt on the next read.
+
+        Used when a role is renamed or deleted, since several roles may share a name.
+
+        :param guild: The guild whose index is outdated.
+        """
+        self._guilds.pop(guild.id, None)
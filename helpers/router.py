@@ -0,0 +1,66 @@
+from typing import Awaitable, Callable, NamedTuple
+
+import discord
+
+# A handler returns True when the message was dealt with and must not be processed any further
+Handler = Callable[[discord.Message], Awaitable[bool | None]]
+
+
+class Trigger(NamedTuple):
+    needle: str
+    handler: Handler
+
+
+class MessageRouter:
+    """
+    Hands incoming messages to the handlers registered for their channel or their content.
+
+    Channel handlers are found with a single dict lookup on the channel ID. Content triggers are keyed by a plain
+    substring, so a message only reaches a trigger's handler, and whatever regex it runs, once the substring was found.
+    Most messages therefore go through one dict lookup and a few substring scans before the commands are processed.
+    """
+
+    def __init__(self) -> None:
+        self._channels: dict[int, list[Handler]] = {}
+        self._triggers: tuple[Trigger, ...] = ()
+
+    def add_channel(self, channel_id: int, handler: Handler) -> None:
+        self._channels.setdefault(channel_id, []).append(handler)
+
+    def remove_channel(self, channel_id: int, handler: Handler) -> None:
+        handlers = self._channels.get(channel_id, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self._channels.pop(channel_id, None)
+
+    def add_trigger(self, needle: str, handler: Handler) -> None:
+        """
+        Register a handler for the messages containing the given text.
+
+        :param needle: The text a message must contain, matched case-sensitively.
+        :param handler: The coroutine function to call with the message.
+        """
+        self._triggers += (Trigger(needle, handler),)
+
+    def remove_trigger(self, handler: Handler) -> None:
+        self._triggers = tuple(trigger for trigger in self._triggers if trigger.handler != handler)
+
+    async def route(self, message: discord.Message) -> bool:
+        """
+        Call the handlers of a message, channel handlers first.
+
+        :param message: The message that was sent.
+        :return: True if a handler dealt with the message and it must not be processed any further.
+        """
+        handlers = self._channels.get(message.channel.id)
+        if handlers:
+            for handler in handlers:
+                if await handler(message):
+                    return True
+
+        content = message.content
+        for needle, handler in self._triggers:
+            if needle in content and await handler(message):
+                return True
+        return False
@@ -1,125 +1,293 @@
-import os
-from datetime import datetime
+import asyncio
+import json
 import logging
+import random
+import re
+import time
+from datetime import datetime
 
+import aiohttp
 import discord
-import requests
-from dotenv import load_dotenv
 import pytz
 
 from helpers import methods
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("discord_bot")
 
 config = methods.load_config()
-load_dotenv()
-
-# Discord webhook URL from environment variable
-DISCORD_WEBHOOK_URL = os.getenv("TWITTER_WEBHOOK")
 
 # The profile image URL of alt_esports_ for the webhook avatar
 ALT_ESPORTS_PROFILE_IMAGE_URL = "https://pbs.twimg.com/profile_images/1799238298961145856/hhni-k3x_normal.jpg"
 
+# The timeline page embeds its data as JSON in this script tag
+NEXT_DATA_PATTERN = re.compile(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', re.S)
+
 
 # Function to get the token based on the Tweet ID
 def get_token(tweet_id):
     return ((int(tweet_id) / 1e15) * 3.141592653589793).hex()[2:].replace("0", "").replace(".", "")
 
 
-# Function to fetch tweet data from Twitter's embedding API
-async def fetch_tweet(tweet_id):
-    token = get_token(tweet_id)
-    url = f"https://cdn.syndication.twimg.com/tweet-result?id={tweet_id}&token={token}&lang=en"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raises HTTPError for bad responses
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching tweet {tweet_id}: {e}")
-    except ValueError as e:
-        logger.error(f"Error parsing JSON response for tweet {tweet_id}: {e}")
-    return None
-
-
 # Function to get high-resolution profile image URL
 def get_high_res_profile_image_url(url):
     return url.replace("_normal", "_400x400")
 
 
-# Function to send a message to Discord
-async def send_to_discord(content, tweet_text, media_url, author_name, author_url, author_icon_url, created_at):
-    if DISCORD_WEBHOOK_URL:
-        embed = {
-            "author": {
-                "name": f"{author_name} (@{author_name})",
-                "url": author_url,
-                "icon_url": author_icon_url
-            },
-            "description": tweet_text,
-            "color": discord.Color.from_str(config["main_color"]).value,
-            "footer": {
-                "text": f"{created_at.strftime('%Y-%m-%d %H:%M:%S CST')}"
-            }
-        }
+def build_tweet_message(tweet_id, tweet_data: dict, message: str = None) -> dict:
+    """
+    Build the webhook message posting a tweet.
+
+    :param tweet_id: The ID of the tweet.
+    :param tweet_data: The tweet payload of the syndication API.
+    :param message: The message that should be sent with the tweet.
+    :return: The webhook message, with its content and a single embed.
+    """
+    tweet_text = tweet_data.get('text')
+    profile_image_url = tweet_data['user']['profile_image_url_https']
+    username = tweet_data['user']['screen_name']
+    author_name = tweet_data['user']['name']
+    author_url = f"https://twitter.com/{username}"
+    created_at_utc = datetime.strptime(tweet_data['created_at'], '%Y-%m-%dT%H:%M:%S.%fZ')
+    central = pytz.timezone('US/Central')
+    created_at = created_at_utc.astimezone(central)
+
+    if username != "alt_esports_":
+        content = (f"[Retweeted](https://twitter.com/alt_esports_/status/{tweet_id})"
+                   f" [@{username}](https://twitter.com/{username})")
+        author_icon_url = get_high_res_profile_image_url(profile_image_url)
+    else:
+        content = f"[Tweeted](https://twitter.com/{username}/status/{tweet_id})"
+        author_icon_url = ""
 
-        if media_url:
-            embed["image"] = {"url": media_url}
+    # Check for media in the tweet
+    media_url = None
+    if 'mediaDetails' in tweet_data and tweet_data['mediaDetails']:
+        media_details = tweet_data['mediaDetails'][0]
+        if 'media_url_https' in media_details:
+            media_url = media_details['media_url_https']
+        elif 'video_info' in media_details and 'variants' in media_details['video_info']:
+            media_url = media_details['video_info']['variants'][0]['url']
 
-        data = {
-            "content": content,
-            "embeds": [embed],
-            "avatar_url": get_high_res_profile_image_url(ALT_ESPORTS_PROFILE_IMAGE_URL)
+    if message:
+        content = message + f"\n{content}"
+
+    embed = {
+        "author": {
+            "name": f"{author_name} (@{author_name})",
+            "url": author_url,
+            "icon_url": author_icon_url
+        },
+        "description": tweet_text,
+        "color": discord.Color.from_str(config["main_color"]).value,
+        "footer": {
+            "text": f"{created_at.strftime('%Y-%m-%d %H:%M:%S CST')}"
         }
+    }
+    if media_url:
+        embed["image"] = {"url": media_url}
 
-        response = requests.post(DISCORD_WEBHOOK_URL, json=data)
-        if response.status_code == 204:
-            logger.info('Message sent successfully')
-        else:
-            logger.error(f'Failed to send message: {response.status_code}, {response.text}')
-    else:
-        logger.error("Discord webhook URL is not set.")
-
-
-# Main function to fetch a tweet and post it to Discord
-async def twitter(tweet_id, message):
-    tweet_data = await fetch_tweet(tweet_id)
-    if tweet_data:
-        tweet_text = tweet_data.get('text')
-        profile_image_url = tweet_data['user']['profile_image_url_https']
-        username = tweet_data['user']['screen_name']
-        author_name = tweet_data['user']['name']
-        author_url = f"https://twitter.com/{username}"
-        created_at_utc = datetime.strptime(tweet_data['created_at'], '%Y-%m-%dT%H:%M:%S.%fZ')
-        central = pytz.timezone('US/Central')
-        created_at_central = created_at_utc.astimezone(central)
-
-        if username != "alt_esports_":
-            content = (f"[Retweeted](https://twitter.com/alt_esports_/status/{tweet_id})"
-                       f" [@{username}](https://twitter.com/{username})")
-            author_icon_url = get_high_res_profile_image_url(profile_image_url)
+    return {"content": content, "embeds": [embed]}
+
+
+def extract_tweet_ids(body: str) -> list[int]:
+    """
+    Get the IDs of the tweets on a timeline page.
+
+    :param body: The timeline page, or the JSON data it embeds.
+    :return: The IDs of the tweets, in no particular order.
+    """
+    match = NEXT_DATA_PATTERN.search(body)
+    data = json.loads(match.group(1) if match else body)
+    entries = data["props"]["pageProps"]["timeline"]["entries"]
+    return [int(entry["content"]["tweet"]["id_str"]) for entry in entries
+            if entry.get("type") == "tweet" and "tweet" in entry.get("content", {})]
+
+
+class TwitterClient:
+    """
+    Fetches tweets from Twitter's embedding API over the bot's shared session.
+
+    Failed requests are retried with exponential backoff and fetched tweets are cached for `cache_ttl` seconds, so
+    posting or retrying the same tweet does not fetch it again.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, *, base_url: str = "https://cdn.syndication.twimg.com",
+                 retries: int = 3, timeout: float = 10, cache_ttl: float = 300, base_delay: float = 1.0) -> None:
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.base_delay = base_delay
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache_ttl = cache_ttl
+        self._cache: dict[str, tuple[float, dict]] = {}
+
+    async def fetch_tweet(self, tweet_id) -> dict | None:
+        """
+        Fetch the payload of a tweet.
+
+        :param tweet_id: The ID of the tweet.
+        :return: The tweet payload, or None if it could not be fetched.
+        """
+        tweet_data, _ = await self.fetch_tweet_result(tweet_id)
+        return tweet_data
+
+    async def fetch_tweet_result(self, tweet_id) -> tuple[dict | None, bool]:
+        """
+        Fetch the payload of a tweet, telling failures that may go away from the ones that will not.
+
+        :param tweet_id: The ID of the tweet.
+        :return: The tweet payload, or None if it could not be fetched, and whether fetching it again may succeed.
+        A deleted, withheld or protected tweet is answered with a client error and will not.
+        """
+        tweet_id = str(tweet_id)
+        cached = self._cache.get(tweet_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], True
+
+        url = f"{self.base_url}/tweet-result?id={tweet_id}&token={get_token(tweet_id)}&lang=en"
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.session.get(url, timeout=self.timeout) as response:
+                    # Client errors other than rate limits will not go away by retrying
+                    if 400 <= response.status < 500 and response.status != 429:
+                        logger.error(f"Error fetching tweet {tweet_id}: {response.status}")
+                        return None, False
+                    response.raise_for_status()
+                    tweet_data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    logger.error(f"Error fetching tweet {tweet_id}: {e}")
+                    return None, True
+                await asyncio.sleep(self.base_delay * (2 ** attempt + random.random()))
+                continue
+            except ValueError as e:
+                logger.error(f"Error parsing JSON response for tweet {tweet_id}: {e}")
+                return None, True
+
+            self._evict()
+            self._cache[tweet_id] = (time.monotonic() + self.cache_ttl, tweet_data)
+            return tweet_data, True
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for tweet_id in [tweet_id for tweet_id, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[tweet_id]
+
+
+class TimelinePoller:
+    """
+    Watches the timelines of Twitter accounts and queues their new tweets for the webhook.
+
+    Every poll is one conditional request per account, answered with a 304 when nothing changed. Checkpoints are kept
+    in the `twitter_checkpoints` table, so no tweet is posted twice, even across restarts. The first poll of an
+    account only records its newest tweet. A tweet that cannot be fetched, because it was deleted or is protected, is
+    skipped. A tweet that failed for another reason holds back the newer tweets until a later poll fetches it, or
+    until it failed `max_failures` polls in a row and is skipped too. An account is polled twice as often after it tweeted and 1.5 times less
+    often after every poll without new tweets, between `min_interval` and `max_interval`.
+    """
+
+    def __init__(self, client: TwitterClient, webhook_queue, database, accounts: list[str], *, base_url: str,
+                 min_interval: float = 60, max_interval: float = 900, max_failures: int = 5) -> None:
+        self.client = client
+        self.webhook_queue = webhook_queue
+        self.database = database
+        self.accounts = accounts
+        self.base_url = base_url.rstrip("/")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_failures = max_failures
+        self.intervals = {account: min_interval for account in accounts}
+        # The tweet every account is stuck on, and how many polls in a row failed to fetch it
+        self._failures: dict[str, tuple[int, int]] = {}
+        self._worker = None
+
+    def start(self) -> None:
+        if self._worker is None and self.accounts:
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        next_polls = {account: time.monotonic() for account in self.accounts}
+        while True:
+            account = min(next_polls, key=next_polls.get)
+            await asyncio.sleep(max(next_polls[account] - time.monotonic(), 0))
+            try:
+                found = await self.poll(account)
+            except Exception as e:
+                logger.exception(f"Failed to poll the timeline of @{account}: {e}")
+                found = 0
+            if found:
+                self.intervals[account] = max(self.intervals[account] / 2, self.min_interval)
+            else:
+                self.intervals[account] = min(self.intervals[account] * 1.5, self.max_interval)
+            next_polls[account] = time.monotonic() + self.intervals[account]
+
+    async def poll(self, account: str) -> int:
+        """
+        Queue the tweets an account posted since the previous poll.
+
+        :param account: The screen name of the account.
+        :return: The number of queued tweets.
+        """
+        checkpoint = await self.database.get_twitter_checkpoint(account)
+        etag, last_modified, last_seen_id = checkpoint or (None, None, None)
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        async with self.client.session.get(f"{self.base_url}/{account}", headers=headers,
+                                           timeout=self.client.timeout) as response:
+            if response.status == 304:
+                return 0
+            response.raise_for_status()
+            body = await response.text()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        tweet_ids = extract_tweet_ids(body)
+        if last_seen_id is None:
+            # Only start from the newest tweet, the timeline is not reposted when an account is added
+            new_ids = []
         else:
-            content = f"[Tweeted](https://twitter.com/{username}/status/{tweet_id})"
-            author_icon_url = ""
-
-        # Check for media in the tweet
-        media_url = None
-        if 'mediaDetails' in tweet_data and tweet_data['mediaDetails']:
-            media_details = tweet_data['mediaDetails'][0]
-            if 'media_url_https' in media_details:
-                media_url = media_details['media_url_https']
-            elif 'video_info' in media_details and 'variants' in media_details['video_info']:
-                media_url = media_details['video_info']['variants'][0]['url']
-
-        if message:
-            content = message + f"\n{content}"
-        await send_to_discord(content, tweet_text, media_url, author_name, author_url, author_icon_url, created_at_central)
-    else:
-        logger.error("Failed to fetch tweet data.")
+            new_ids = sorted(tweet_id for tweet_id in tweet_ids if tweet_id > last_seen_id)
 
+        queued = 0
+        stuck = False
+        for tweet_id in new_ids:
+            tweet_data, retryable = await self.client.fetch_tweet_result(tweet_id)
+            if tweet_data is None and retryable:
+                failed_tweet_id, failures = self._failures.get(account, (tweet_id, 0))
+                failures = failures + 1 if failed_tweet_id == tweet_id else 1
+                if failures < self.max_failures:
+                    # Stop here, the tweet is fetched again on the next poll
+                    self._failures[account] = (tweet_id, failures)
+                    stuck = True
+                    break
+                logger.error(f"Skipping tweet {tweet_id} of @{account} after {failures} failed polls")
+            elif tweet_data is None:
+                logger.warning(f"Skipping tweet {tweet_id} of @{account}, it is no longer available")
+            else:
+                await self.webhook_queue.enqueue(build_tweet_message(tweet_id, tweet_data))
+                queued += 1
+            self._failures.pop(account, None)
+            last_seen_id = tweet_id
+        else:
+            last_seen_id = max(tweet_ids + [last_seen_id or 0]) or None
 
-# Example usage
-if __name__ == "__main__":
-    # Replace with the actual Tweet ID you want to fetch and post
-    tweet_id = "1805251519077638318"  # Example Tweet ID
-    twitter(tweet_id, None)
+        if stuck:
+            # Drop the validators so the next poll fetches the timeline again
+            etag = last_modified = None
+        await self.database.set_twitter_checkpoint(account, etag, last_modified, last_seen_id)
+        if queued:
+            logger.info(f"Queued {queued} new tweet(s) of @{account}")
+        return queued
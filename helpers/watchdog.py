@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+logger = logging.getLogger("discord_bot")
+
+
+class LoopWatchdog:
+    """
+    Measures how late the event loop wakes up from a fixed sleep and logs the stack of the code blocking it.
+
+    A task on the loop records the lag of every sample and a heartbeat. A helper thread checks the heartbeat and,
+    once the loop has not beaten for longer than the interval plus the threshold, logs the stack the loop thread is
+    stuck in, while it is still stuck in it.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25, samples: int = 1200) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: deque[float] = deque(maxlen=samples)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """
+        Start sampling the running event loop.
+        """
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def close(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def _sample(self) -> None:
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - started_at - self.interval, 0.0)
+            self._heartbeat = now
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat <= self.interval + self.threshold or heartbeat == reported:
+                continue
+            # Only report a stall once, the loop beats again when it is over
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stack = "".join(traceback.format_stack(frame))
+                logger.warning(f"Event loop is blocked, it is currently running:\n{stack}")
+
+    def percentiles(self, *percents: float) -> list[float]:
+        """
+        Get percentiles of the sampled lags.
+
+        :param percents: The percentiles to get, between 0 and 100.
+        :return: The lag at every percentile, in seconds.
+        """
+        lags = sorted(self.lags)
+        if not lags:
+            return [0.0 for _ in percents]
+        return [lags[min(int(len(lags) * percent / 100), len(lags) - 1)] for percent in percents]
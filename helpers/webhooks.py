@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+
+logger = logging.getLogger("discord_bot")
+
+MAX_EMBEDS = 10
+MAX_CONTENT_LENGTH = 2000
+
+
+class WebhookQueue:
+    """
+    Delivers webhook messages from a queue persisted in the `webhook_queue` table, so no message is lost to a rate
+    limit, an outage or a restart.
+
+    Messages queued together are merged into a single webhook execution, up to 10 embeds and 2000 characters of
+    content. A 429 response is retried after its `Retry-After`, other failures are retried with a jittered
+    exponential backoff until `max_attempts` is reached.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, database, url: str | None, *, avatar_url: str = None,
+                 max_attempts: int = 8, base_delay: float = 2.0, max_delay: float = 300.0,
+                 timeout: float = 10) -> None:
+        self.session = session
+        self.database = database
+        self.url = url
+        self.avatar_url = avatar_url
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._wakeup = asyncio.Event()
+        self._worker = None
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def enqueue(self, message: dict) -> None:
+        """
+        Queue a webhook message for delivery.
+
+        :param message: The webhook message, with its content and embeds.
+        """
+        await self.database.add_webhook_message(json.dumps(message))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            rows = await self.database.get_due_webhook_messages(time.time())
+            if not rows:
+                next_attempt_at = await self.database.get_next_webhook_attempt()
+                timeout = None if next_attempt_at is None else max(next_attempt_at - time.time(), 0)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if not self.url:
+                logger.error("Webhook URL is not set, dropping the queued webhook messages.")
+                await self.database.delete_webhook_messages([row[0] for row in rows])
+                continue
+
+            batch, payload = self._batch(rows)
+            try:
+                await self._deliver(batch, payload)
+            except Exception as e:
+                logger.exception(f"Failed to deliver webhook messages: {e}")
+                await self._retry(batch)
+
+    def _batch(self, rows: list) -> tuple[list, dict]:
+        batch = []
+        contents = []
+        embeds = []
+        for row in rows:
+            message = json.loads(row[1])
+            message_embeds = message.get("embeds", [])
+            content = "\n".join(contents + [message["content"]]) if message.get("content") else "\n".join(contents)
+            if batch and (len(embeds) + len(message_embeds) > MAX_EMBEDS or len(content) > MAX_CONTENT_LENGTH):
+                break
+            batch.append(row)
+            if message.get("content"):
+                contents.append(message["content"])
+            embeds.extend(message_embeds)
+
+        payload = {"content": "\n".join(contents), "embeds": embeds}
+        if self.avatar_url:
+            payload["avatar_url"] = self.avatar_url
+        return batch, payload
+
+    async def _deliver(self, batch: list, payload: dict) -> None:
+        ids = [row[0] for row in batch]
+        async with self.session.post(self.url, json=payload, timeout=self.timeout) as response:
+            if response.status == 429:
+                retry_after = response.headers.get("Retry-After")
+                if retry_after is None:
+                    retry_after = (await response.json(content_type=None)).get("retry_after", self.base_delay)
+                # Rate limits are not failures, so the attempt is not counted
+                await self.database.reschedule_webhook_messages(ids, time.time() + float(retry_after), attempted=False)
+                logger.warning(f"Webhook is rate limited, retrying in {float(retry_after):.2f} seconds")
+                return
+            if response.status >= 500:
+                logger.warning(f"Webhook responded with {response.status}, retrying later")
+                await self._retry(batch)
+                return
+            if response.status >= 400:
+                logger.error(f"Failed to send webhook message: {response.status}, {await response.text()}")
+                await self.database.delete_webhook_messages(ids)
+                return
+
+        await self.database.delete_webhook_messages(ids)
+        logger.info(f"Sent {len(batch)} webhook message(s)")
+
+    async def _retry(self, batch: list) -> None:
+        retry = [row for row in batch if row[2] + 1 < self.max_attempts]
+        dropped = [row[0] for row in batch if row[2] + 1 >= self.max_attempts]
+        if dropped:
+            logger.error(f"Dropping {len(dropped)} webhook message(s) after {self.max_attempts} attempts")
+            await self.database.delete_webhook_messages(dropped)
+        for row in retry:
+            delay = min(self.base_delay * 2 ** row[2], self.max_delay) * random.uniform(0.5, 1.5)
+            await self.database.reschedule_webhook_messages([row[0]], time.time() + delay, attempted=True)
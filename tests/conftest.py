@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+import aiosqlite
+import pytest
+from aiohttp import web
+
+from database import DatabaseManager, run_migrations
+
+SCHEMA_PATH = f"{os.path.realpath(os.path.dirname(__file__))}/../database/schema.sql"
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+
+
+async def create_database(path: str) -> None:
+    """
+    Create a database file the way DiscordBot.init_db() does.
+    """
+    async with aiosqlite.connect(path) as db:
+        with open(SCHEMA_PATH) as file:
+            await db.executescript(file.read())
+        await db.commit()
+        await run_migrations(db)
+
+
+@pytest.fixture
+def database(loop, tmp_path):
+    path = str(tmp_path / "database.db")
+    loop.run_until_complete(create_database(path))
+    database = loop.run_until_complete(DatabaseManager.connect(path, readers=2))
+    yield database
+    loop.run_until_complete(database.close())
+
+
+async def start_stub(app: web.Application) -> tuple[web.AppRunner, str]:
+    """
+    Serve an aiohttp application on a free local port.
+
+    :return: The runner to clean up and the base URL of the server.
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{runner.addresses[0][1]}"
@@ -0,0 +1,110 @@
+import asyncio
+import gc
+
+import pytest
+
+
+def count_commits(database) -> list:
+    commits = [0]
+    commit = database.connection.commit
+
+    async def counted_commit():
+        commits[0] += 1
+        await commit()
+
+    database.connection.commit = counted_commit
+    return commits
+
+
+def test_concurrent_writes_share_a_commit(loop, database):
+    async def run():
+        await database.create_team("Alternate Test", "#114b5f", "banner.png")
+        commits = count_commits(database)
+        await asyncio.gather(*(database.add_player(i, "Alternate Test", "Player") for i in range(50)))
+        # The first write commits on its own, the others arrive while it runs and share the following commits
+        assert commits[0] < 10
+        assert len(await database.get_players("Alternate Test")) == 50
+
+    loop.run_until_complete(run())
+
+
+def test_lone_write_commits_without_waiting(loop, database):
+    async def run():
+        commits = count_commits(database)
+        for i in range(5):
+            await asyncio.wait_for(database.add_player(i, "Alternate Test", "Player"), 1)
+        assert commits[0] == 5
+
+    loop.run_until_complete(run())
+
+
+def test_pending_flush_survives_garbage_collection(loop, database):
+    async def run():
+        commits = count_commits(database)
+        write = asyncio.ensure_future(database.add_player(1, "Alternate Test", "Player"))
+        # Let the flush task start, then drop every other reference to it
+        while database._flush_task is None:
+            await asyncio.sleep(0)
+        gc.collect()
+        await asyncio.wait_for(write, 1)
+        assert commits[0] == 1
+        assert database._flush_task is None
+
+    loop.run_until_complete(run())
+
+
+def test_transaction_commits_once_and_rolls_back_on_error(loop, database):
+    async def run():
+        await database.create_team("Alternate Test", "#114b5f", "banner.png")
+        commits = count_commits(database)
+        async with database.transaction():
+            for i in range(10):
+                await database.add_player(i, "Alternate Test", "Player")
+        assert commits[0] == 1
+
+        with pytest.raises(ValueError):
+            async with database.transaction():
+                await database.add_player(100, "Alternate Test", "Player")
+                raise ValueError
+        assert await database.get_player(100) is None
+        assert len(await database.get_players("Alternate Test")) == 10
+
+    loop.run_until_complete(run())
+
+
+def test_rollback_keeps_the_writes_of_an_overlapping_block(loop, database):
+    async def run():
+        a_inserted = asyncio.Event()
+        b_failed = asyncio.Event()
+
+        async def block_a():
+            async with database.transaction():
+                await database.add_player(1, "Alternate Test", "Player")
+                a_inserted.set()
+                await asyncio.sleep(0.05)
+                await database.add_player(2, "Alternate Test", "Player")
+
+        async def block_b():
+            await a_inserted.wait()
+            try:
+                async with database.transaction():
+                    await database.add_player(3, "Alternate Test", "Player")
+                    raise ValueError
+            finally:
+                b_failed.set()
+
+        async def plain_write():
+            await a_inserted.wait()
+            await database.add_player(4, "Alternate Test", "Player")
+
+        results = await asyncio.wait_for(
+            asyncio.gather(block_a(), block_b(), plain_write(), return_exceptions=True), 2
+        )
+        assert results[0] is None
+        assert isinstance(results[1], ValueError)
+        assert results[2] is None
+        assert b_failed.is_set()
+        stored = [await database.get_player(i) for i in range(1, 5)]
+        assert [player is not None for player in stored] == [True, True, False, True]
+
+    loop.run_until_complete(run())
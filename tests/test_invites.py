@@ -0,0 +1,143 @@
+import asyncio
+from types import SimpleNamespace
+
+from helpers.invites import InviteTracker
+
+
+class FakeGuild:
+    """
+    A guild whose invite fetches take a while, like a REST call during a join burst.
+    """
+
+    def __init__(self, invites: dict[str, int], max_uses: dict[str, int] = None) -> None:
+        self.id = 1
+        self.uses = dict(invites)
+        self.max_uses = max_uses or {}
+        self.fetches = 0
+
+    def invite(self, code: str) -> SimpleNamespace:
+        return SimpleNamespace(code=code, uses=self.uses[code], max_uses=self.max_uses.get(code, 0), guild=self)
+
+    async def invites(self) -> list:
+        self.fetches += 1
+        snapshot = [self.invite(code) for code in self.uses]
+        await asyncio.sleep(0.01)
+        return snapshot
+
+    def join(self, code: str) -> None:
+        self.uses[code] += 1
+        if self.max_uses.get(code) and self.uses[code] >= self.max_uses[code]:
+            del self.uses[code]
+
+
+async def burst(tracker: InviteTracker, guild: FakeGuild, codes: list[str], tryout_codes: set[str]) -> list:
+    joins = []
+    for code in codes:
+        guild.join(code)
+        joins.append(asyncio.create_task(tracker.find_used_invite(guild, tryout_codes)))
+        await asyncio.sleep(0)
+    return [invite.code if invite else None for invite in await asyncio.gather(*joins)]
+
+
+def test_single_join_finds_its_invite(loop):
+    async def run():
+        guild = FakeGuild({"tryout": 0, "public": 5})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+        guild.join("tryout")
+        assert (await tracker.find_used_invite(guild, {"tryout"})).code == "tryout"
+        guild.join("public")
+        assert await tracker.find_used_invite(guild, {"tryout"}) is None
+
+    loop.run_until_complete(run())
+
+
+def test_join_burst_shares_fetches(loop):
+    async def run():
+        guild = FakeGuild({"tryout": 0, "public": 5})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+        guild.fetches = 0
+
+        assert await burst(tracker, guild, ["tryout"] * 50, {"tryout"}) == ["tryout"] * 50
+        assert guild.fetches <= 2
+
+    loop.run_until_complete(run())
+
+
+def test_unclaimed_uses_carry_over_to_waiting_joins(loop):
+    async def run():
+        guild = FakeGuild({"tryout": 0})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+
+        # The second join is counted by the first fetch, but its handler only asks once that fetch is in flight
+        guild.join("tryout")
+        first = asyncio.create_task(tracker.find_used_invite(guild, {"tryout"}))
+        guild.join("tryout")
+        await asyncio.sleep(0)
+        second = asyncio.create_task(tracker.find_used_invite(guild, {"tryout"}))
+        assert (await first).code == "tryout"
+        assert (await second).code == "tryout"
+    loop.run_until_complete(run())
+
+
+def test_mixed_round_is_not_attributed(loop, caplog):
+    async def run():
+        guild = FakeGuild({"tryout": 0, "public": 5})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+
+        # Both joins are counted by the same fetch, nobody can tell which member used the tryout invite
+        guild.join("public")
+        guild.join("tryout")
+        attributed = await asyncio.gather(*(tracker.find_used_invite(guild, {"tryout"}) for _ in range(2)))
+        assert attributed == [None, None]
+        assert "were not attributed" in caplog.text
+
+        # The ambiguous uses are not handed to the next join
+        guild.join("tryout")
+        assert (await tracker.find_used_invite(guild, {"tryout"})).code == "tryout"
+
+    loop.run_until_complete(run())
+
+
+def test_mixed_burst_never_attributes_the_wrong_invite(loop):
+    async def run():
+        guild = FakeGuild({"tryout": 0, "ringer": 0, "public": 5})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+        codes = ["public", "tryout", "ringer", "public", "tryout"]
+        attributed = await burst(tracker, guild, codes, {"tryout", "ringer"})
+        assert all(code is None or code == used for code, used in zip(attributed, codes))
+
+    loop.run_until_complete(run())
+
+
+def test_single_use_invite_deleted_by_discord(loop):
+    async def run():
+        guild = FakeGuild({"tryout": 0}, max_uses={"tryout": 1})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+        guild.join("tryout")
+        assert (await tracker.find_used_invite(guild, {"tryout"})).code == "tryout"
+
+    loop.run_until_complete(run())
+
+
+def test_failed_fetch_is_raised_to_every_join(loop):
+    async def run():
+        guild = FakeGuild({"tryout": 0})
+        tracker = InviteTracker()
+        await tracker.load(guild)
+
+        async def invites():
+            raise RuntimeError("Discord is down")
+
+        guild.invites = invites
+        results = await asyncio.gather(*(tracker.find_used_invite(guild, {"tryout"}) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not tracker._rounds
+
+    loop.run_until_complete(run())
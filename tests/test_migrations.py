@@ -0,0 +1,93 @@
+import os
+
+import aiosqlite
+import pytest
+
+from database import MIGRATIONS_PATH, DatabaseManager, run_migrations
+from tests.conftest import SCHEMA_PATH, create_database
+
+LATEST_VERSION = max(int(file.split("_", 1)[0]) for file in os.listdir(MIGRATIONS_PATH) if file.endswith(".sql"))
+
+# Every keyed lookup of DatabaseManager, reads that return a whole table on purpose are left out
+LOOKUPS = [
+    ("get_player", lambda db: db.get_player(1)),
+    ("get_player_team", lambda db: db.get_player_team(1)),
+    ("get_players", lambda db: db.get_players("Alternate Test")),
+    ("get_team", lambda db: db.get_team("Alternate Test")),
+    ("get_managed_teams", lambda db: db.get_managed_teams(1)),
+    ("get_managed_teams_by_manager", lambda db: db.get_managed_teams_by_manager()),
+    ("get_warnings", lambda db: db.get_warnings(1, 2)),
+    ("add_warn", lambda db: db.add_warn(1, 2, 3, "Test")),
+    ("remove_warn", lambda db: db.remove_warn(1, 1, 2)),
+    ("delete_player", lambda db: db.delete_player(1)),
+    ("edit_player", lambda db: db.edit_player(1, role="Coach")),
+    ("get_roster_refresh", lambda db: db.get_roster_refresh("Alternate Test")),
+    ("get_roster_messages", lambda db: db.get_roster_messages("Alternate Test")),
+    ("get_roster_key", lambda db: db.get_roster_key(1)),
+    ("get_unvalidated_tryout_invites", lambda db: db.get_unvalidated_tryout_invites(0)),
+    ("get_due_webhook_messages", lambda db: db.get_due_webhook_messages(0)),
+    ("get_next_webhook_attempt", lambda db: db.get_next_webhook_attempt()),
+    ("get_twitter_checkpoint", lambda db: db.get_twitter_checkpoint("alt_esports_")),
+]
+
+# The webhook queue is read in id order to keep the order tweets were queued in. SQLite walks the rowid and stops at
+# the first 10 due messages, which is cheaper than sorting every due message found through the index.
+ORDERED_SCANS = {"SCAN webhook_queue"}
+
+
+def test_due_webhook_messages_are_read_in_order(loop, database):
+    async def run():
+        for payload in ("first", "second", "third"):
+            await database.add_webhook_message(payload)
+        first_id = (await database.get_due_webhook_messages(0))[0][0]
+        await database.reschedule_webhook_messages([first_id], 1, attempted=True)
+        rows = await database.get_due_webhook_messages(1)
+        assert [row[1] for row in rows] == ["first", "second", "third"]
+        assert rows[0][2] == 1
+
+    loop.run_until_complete(run())
+
+
+def test_migrations_apply_once(loop, tmp_path):
+    async def run():
+        path = str(tmp_path / "database.db")
+        await create_database(path)
+        async with aiosqlite.connect(path) as db:
+            async with db.execute("PRAGMA user_version") as cursor:
+                assert (await cursor.fetchone())[0] == LATEST_VERSION
+            # Running the migrations again is a no-op
+            assert await run_migrations(db) == LATEST_VERSION
+            with open(SCHEMA_PATH) as file:
+                await db.executescript(file.read())
+            assert await run_migrations(db) == LATEST_VERSION
+
+    loop.run_until_complete(run())
+
+
+@pytest.mark.parametrize("name, lookup", LOOKUPS, ids=[name for name, _ in LOOKUPS])
+def test_lookup_uses_index(loop, tmp_path, name, lookup):
+    async def run():
+        path = str(tmp_path / "database.db")
+        await create_database(path)
+        # Without readers every statement runs on the writer, where it is traced
+        database = await DatabaseManager.connect(path, readers=0)
+        statements = []
+        await database.connection.set_trace_callback(statements.append)
+        try:
+            await lookup(database)
+            await database.connection.set_trace_callback(None)
+            queries = [
+                statement for statement in statements
+                if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))
+            ]
+            assert queries, f"{name} ran no query"
+            for query in queries:
+                async with database.connection.execute(f"EXPLAIN QUERY PLAN {query}") as cursor:
+                    plan = [row[3] for row in await cursor.fetchall()]
+                scans = [step for step in plan if step.startswith("SCAN") and step not in ORDERED_SCANS]
+                assert not scans, f"{name} scans a table: {query!r} -> {plan}"
+                assert any(step.startswith("SEARCH") or step in ORDERED_SCANS for step in plan), f"{name} uses no index: {query!r} -> {plan}"
+        finally:
+            await database.close()
+
+    loop.run_until_complete(run())
@@ -0,0 +1,30 @@
+from helpers.profiler import Profiler
+
+
+def test_start_command_does_not_count_against_the_budget():
+    profiler = Profiler()
+    start_command = object()
+    profiler.command_started(start_command)
+    profiler.start(commands=1)
+    # The command that started the profile completes after the profile started
+    profiler.command_finished(start_command)
+    assert profiler.running
+
+    command = object()
+    profiler.command_started(command)
+    profiler.command_finished(command)
+    assert not profiler.running
+    assert profiler.report is not None
+
+
+def test_commands_are_counted_until_the_budget_is_spent():
+    profiler = Profiler()
+    profiler.start(commands=3)
+    commands = [object() for _ in range(3)]
+    for command in commands:
+        profiler.command_started(command)
+    for command in commands[:2]:
+        profiler.command_finished(command)
+        assert profiler.running
+    profiler.command_finished(commands[2])
+    assert not profiler.running
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+
+from helpers.purge import Purger
+
+
+class FakeChannel:
+    """
+    A channel whose history follows the ordering rules of discord.py, oldest first whenever after is set.
+    """
+
+    def __init__(self, ages_in_days: list[float]) -> None:
+        now = datetime.now(timezone.utc)
+        self.messages = [self.message(i, now - timedelta(days=age)) for i, age in enumerate(ages_in_days)]
+        self.bulk_deletes = []
+        self.deletes = []
+
+    def message(self, message_id: int, created_at: datetime) -> SimpleNamespace:
+        async def delete():
+            self.deletes.append(message_id)
+
+        return SimpleNamespace(id=message_id, created_at=created_at, author=SimpleNamespace(id=message_id % 2),
+                               content=f"message {message_id}", attachments=[], delete=delete)
+
+    async def history(self, limit=None, before=None, after=None, oldest_first=None):
+        messages = sorted(self.messages, key=lambda message: message.created_at,
+                          reverse=not (after is not None if oldest_first is None else oldest_first))
+        messages = [message for message in messages if not (before is not None and message.id >= before.id
+                                                             or after is not None and message.id <= after.id)]
+        for message in messages[:limit]:
+            yield message
+
+    async def delete_messages(self, messages: list) -> None:
+        self.bulk_deletes.append([message.id for message in messages])
+
+
+def test_young_messages_are_bulk_deleted_and_old_ones_one_by_one(loop):
+    # Message IDs grow with time, like snowflakes
+    channel = FakeChannel([30 - i * 0.1 for i in range(300)])
+
+    deleted = loop.run_until_complete(Purger(channel, 250, old_delay=0).run())
+    assert deleted == 250
+    young = [message.id for message in channel.messages if message.created_at > datetime.now(timezone.utc)
+             - timedelta(days=14)][::-1]
+    assert channel.bulk_deletes == [young[:100], young[100:]]
+    assert sorted(channel.deletes) == list(range(299 - 249, 299 - len(young) + 1))
+
+
+def test_after_filter_deletes_the_newest_messages(loop):
+    channel = FakeChannel([10 - i * 0.01 for i in range(100)])
+
+    purger = Purger(channel, 5, after=SimpleNamespace(id=50), old_delay=0)
+    assert loop.run_until_complete(purger.run()) == 5
+    assert channel.bulk_deletes == [[99, 98, 97, 96, 95]]
+
+
+def test_filters(loop):
+    channel = FakeChannel([1] * 20)
+    channel.messages[3].content = "Tryouts are OPEN"
+    channel.messages[4].attachments = [object()]
+
+    assert loop.run_until_complete(Purger(channel, 100, contains="tryouts").run()) == 1
+    assert loop.run_until_complete(Purger(channel, 100, has_attachment=True).run()) == 1
+    assert loop.run_until_complete(Purger(channel, 100, author=SimpleNamespace(id=1)).run()) == 10
+    assert channel.bulk_deletes[:2] == [[3], [4]]
+
+
+def test_scan_stops_at_the_limit(loop):
+    channel = FakeChannel([1 - i * 0.001 for i in range(50)])
+    # The only match is the oldest message, past the scan limit
+    channel.messages[0].content = "Tryouts are open"
+
+    purger = Purger(channel, 10, contains="tryouts", max_scanned=20)
+    assert loop.run_until_complete(purger.run()) == 0
+    assert purger.scanned == 20
+
+
+class AgingChannel(FakeChannel):
+    """
+    A channel whose oldest message ages past the bulk delete limit before its batch is sent.
+    """
+
+    async def history(self, **kwargs):
+        message = None
+        async for message in super().history(**kwargs):
+            yield message
+        message.created_at -= timedelta(hours=1)
+
+
+def test_messages_that_aged_during_the_scan_are_deleted_one_by_one(loop):
+    channel = AgingChannel([13.99 - i * 0.0001 for i in range(10)])
+
+    assert loop.run_until_complete(Purger(channel, 100, old_delay=0).run()) == 10
+    assert channel.deletes == [0]
+    assert channel.bulk_deletes == [list(range(9, 0, -1))]
+
+
+def test_rejected_bulk_delete_falls_back_to_single_deletes(loop):
+    channel = FakeChannel([1] * 5)
+
+    async def delete_messages(messages: list) -> None:
+        raise discord.HTTPException(SimpleNamespace(status=400, reason="Bad Request"), "Invalid Form Body")
+
+    channel.delete_messages = delete_messages
+    purger = Purger(channel, 100, old_delay=0)
+    assert loop.run_until_complete(purger.run()) == 5
+    assert sorted(channel.deletes) == list(range(5))
+    assert purger.bulk_deleted == 0 and purger.failed == 0
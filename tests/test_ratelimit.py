@@ -0,0 +1,26 @@
+from helpers.ratelimit import SlidingWindowLimiter
+
+
+def test_limit_returns_every_message_of_the_window():
+    limiter = SlidingWindowLimiter(limit=3, window=10, cooldown=15)
+    assert limiter.hit(1, (10, 1), now=0) == (False, [])
+    assert limiter.hit(1, (20, 2), now=1) == (False, [])
+    # The messages keep their channel, so they can be deleted where they were sent
+    assert limiter.hit(1, (30, 3), now=2) == (True, [(10, 1), (20, 2), (30, 3)])
+    assert limiter.hit(1, (10, 4), now=5) == (False, [(10, 4)])
+    assert limiter.hit(1, (10, 5), now=20) == (False, [])
+
+
+def test_slow_messages_do_not_trip():
+    limiter = SlidingWindowLimiter(limit=3, window=10)
+    for i in range(10):
+        assert limiter.hit(1, i, now=i * 6) == (False, [])
+
+
+def test_idle_and_excess_keys_are_evicted():
+    limiter = SlidingWindowLimiter(limit=3, window=10, cooldown=5, max_keys=4)
+    for key in range(10):
+        limiter.hit(key, key, now=0)
+    assert len(limiter) == 4
+    limiter.hit("late", 0, now=100)
+    assert len(limiter) == 1
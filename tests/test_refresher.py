@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+from helpers.refresher import RosterRefresher
+
+
+def test_teamless_refreshes_are_ignored(loop, database):
+    async def run():
+        published = []
+
+        async def publish(team, embeds):
+            published.append(team)
+
+        bot = SimpleNamespace(database=database, roster_publisher=SimpleNamespace(publish=publish),
+                              get_guild=lambda guild_id: None)
+        refresher = RosterRefresher(bot, debounce=0)
+        guild = SimpleNamespace(id=1)
+
+        refresher.enqueue(None, guild)
+        assert not refresher._workers
+        assert isinstance(await refresher.refresh(None, guild), LookupError)
+        assert not published
+        async with database.connection.execute("SELECT COUNT(*) FROM roster_refreshes") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+
+        # A team that does not exist is a failed refresh, which is recorded
+        assert isinstance(await refresher.refresh("Alternate Test", guild), LookupError)
+        assert (await database.get_roster_refresh("Alternate Test"))[1] == "Team Alternate Test doesn't exist."
+        await refresher.close()
+
+    loop.run_until_complete(run())
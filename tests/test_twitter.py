@@ -0,0 +1,201 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from helpers.twitter import TimelinePoller, TwitterClient, build_tweet_message
+from tests.conftest import start_stub
+
+TWEET = {
+    "text": "GG",
+    "created_at": "2024-06-01T18:30:00.000Z",
+    "user": {"name": "Alternate eSports", "screen_name": "alt_esports_", "profile_image_url_https": "https://x/a_normal.jpg"},
+}
+
+
+class SyndicationStub:
+    """
+    Answers tweet-result requests with the queued statuses, then with the tweet, after `delay` seconds.
+    """
+
+    def __init__(self, statuses: list[int] = (), delay: float = 0) -> None:
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.requests = 0
+        # The status every request for a tweet is answered with, instead of the tweet
+        self.tweet_statuses: dict[str, int] = {}
+        self.timeline: list[int] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if self.statuses:
+            return web.Response(status=self.statuses.pop(0))
+        if request.query["id"] in self.tweet_statuses:
+            return web.Response(status=self.tweet_statuses[request.query["id"]])
+        return web.json_response({**TWEET, "id_str": request.query["id"]})
+
+    async def handle_timeline(self, request: web.Request) -> web.Response:
+        entries = [{"type": "tweet", "content": {"tweet": {"id_str": str(tweet_id)}}} for tweet_id in self.timeline]
+        return web.json_response({"props": {"pageProps": {"timeline": {"entries": entries}}}})
+
+    async def start(self) -> tuple[web.AppRunner, str]:
+        app = web.Application()
+        app.router.add_get("/tweet-result", self.handle)
+        app.router.add_get("/timeline/{account}", self.handle_timeline)
+        return await start_stub(app)
+
+
+class QueueStub:
+    def __init__(self) -> None:
+        self.messages = []
+
+    async def enqueue(self, message: dict) -> None:
+        self.messages.append(message)
+
+
+async def watch_loop(lags: list, interval: float = 0.005) -> None:
+    while True:
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started_at - interval)
+
+
+def test_fetch_retries_server_errors(loop):
+    async def run():
+        stub = SyndicationStub([503, 502])
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url, base_delay=0.01)
+            tweet = await client.fetch_tweet(123)
+        await runner.cleanup()
+        assert tweet["id_str"] == "123"
+        assert stub.requests == 3
+
+    loop.run_until_complete(run())
+
+
+def test_fetch_gives_up_on_client_errors_and_after_retries(loop):
+    async def run():
+        stub = SyndicationStub([404, 500, 500, 500, 500])
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url, retries=3, base_delay=0.01)
+            assert await client.fetch_tweet(1) is None
+            assert stub.requests == 1
+            assert await client.fetch_tweet(2) is None
+            assert stub.requests == 5
+        await runner.cleanup()
+
+    loop.run_until_complete(run())
+
+
+def test_fetch_times_out(loop):
+    async def run():
+        stub = SyndicationStub(delay=0.3)
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url, retries=1, timeout=0.05, base_delay=0.01)
+            started_at = time.perf_counter()
+            assert await client.fetch_tweet(1) is None
+            assert time.perf_counter() - started_at < 0.5
+        await runner.cleanup()
+
+    loop.run_until_complete(run())
+
+
+def test_fetched_tweets_are_cached(loop):
+    async def run():
+        stub = SyndicationStub()
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url, cache_ttl=0.1)
+            await client.fetch_tweet(1)
+            await client.fetch_tweet("1")
+            assert stub.requests == 1
+            await asyncio.sleep(0.15)
+            await client.fetch_tweet(1)
+            assert stub.requests == 2
+        await runner.cleanup()
+
+    loop.run_until_complete(run())
+
+
+def test_fetch_does_not_block_the_event_loop(loop):
+    async def run():
+        stub = SyndicationStub(delay=0.2)
+        runner, url = await stub.start()
+        lags = []
+        watcher = asyncio.create_task(watch_loop(lags))
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url)
+            await asyncio.gather(*(client.fetch_tweet(i) for i in range(5)))
+        watcher.cancel()
+        await runner.cleanup()
+        # A blocking request would stall the loop for the whole 200ms the stub takes to answer
+        assert len(lags) > 20
+        assert max(lags) < 0.1
+
+    loop.run_until_complete(run())
+
+
+def test_poller_skips_unavailable_tweets(loop, database):
+    async def run():
+        stub = SyndicationStub()
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url, retries=0)
+            queue = QueueStub()
+            poller = TimelinePoller(client, queue, database, ["alt_esports_"], base_url=f"{url}/timeline")
+            stub.timeline = [100]
+            assert await poller.poll("alt_esports_") == 0
+
+            # A deleted tweet does not hold back the tweets after it
+            stub.timeline = [100, 101, 102, 103]
+            stub.tweet_statuses["101"] = 404
+            assert await poller.poll("alt_esports_") == 2
+            assert (await database.get_twitter_checkpoint("alt_esports_"))[2] == 103
+        await runner.cleanup()
+        assert ["102" in message["content"] for message in queue.messages] == [True, False]
+
+    loop.run_until_complete(run())
+
+
+def test_poller_retries_failing_tweets_up_to_a_limit(loop, database):
+    async def run():
+        stub = SyndicationStub()
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            client = TwitterClient(session, base_url=url, retries=0)
+            queue = QueueStub()
+            poller = TimelinePoller(client, queue, database, ["alt_esports_"], base_url=f"{url}/timeline",
+                                    max_failures=3)
+            stub.timeline = [100]
+            await poller.poll("alt_esports_")
+
+            stub.timeline = [100, 101, 102]
+            stub.tweet_statuses["101"] = 503
+            assert await poller.poll("alt_esports_") == 0
+            assert await poller.poll("alt_esports_") == 0
+            assert (await database.get_twitter_checkpoint("alt_esports_"))[2] == 100
+
+            # The tweet is fetched again once the outage is over
+            del stub.tweet_statuses["101"]
+            assert await poller.poll("alt_esports_") == 2
+
+            # A tweet that keeps failing is skipped on the last allowed poll
+            stub.timeline = [100, 101, 102, 103, 104]
+            stub.tweet_statuses["103"] = 503
+            assert [await poller.poll("alt_esports_") for _ in range(3)] == [0, 0, 1]
+            assert (await database.get_twitter_checkpoint("alt_esports_"))[2] == 104
+        await runner.cleanup()
+
+    loop.run_until_complete(run())
+
+
+def test_build_tweet_message():
+    message = build_tweet_message(123, TWEET, "Look")
+    assert message["content"] == "Look\n[Tweeted](https://twitter.com/alt_esports_/status/123)"
+    assert len(message["embeds"]) == 1
+    assert message["embeds"][0]["description"] == "GG"
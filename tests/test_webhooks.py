@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from helpers.webhooks import WebhookQueue
+from tests.conftest import start_stub
+
+
+class WebhookStub:
+    """
+    Records every webhook execution, answering with the queued responses first.
+    """
+
+    def __init__(self, responses: list[web.Response] = ()) -> None:
+        self.responses = list(responses)
+        self.payloads = []
+        self.times = []
+        self.received = asyncio.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.times.append(time.monotonic())
+        if self.responses:
+            return self.responses.pop(0)
+        self.payloads.append(await request.json())
+        self.received.set()
+        return web.Response(status=204)
+
+    async def start(self) -> tuple[web.AppRunner, str]:
+        app = web.Application()
+        app.router.add_post("/webhook", self.handle)
+        runner, url = await start_stub(app)
+        return runner, f"{url}/webhook"
+
+
+def tweet(i: int) -> dict:
+    return {"content": f"Tweet {i}", "embeds": [{"description": f"Tweet {i}"}]}
+
+
+async def wait_for_payloads(stub: WebhookStub, count: int) -> None:
+    while len(stub.payloads) < count:
+        stub.received.clear()
+        await asyncio.wait_for(stub.received.wait(), 2)
+
+
+def test_queued_messages_are_batched(loop, database):
+    async def run():
+        stub = WebhookStub()
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            queue = WebhookQueue(session, database, url)
+            for i in range(12):
+                await queue.enqueue(tweet(i))
+            queue.start()
+            await wait_for_payloads(stub, 2)
+            # Delivered messages are deleted once the response is received
+            async with asyncio.timeout(2):
+                while await database.get_next_webhook_attempt() is not None:
+                    await asyncio.sleep(0.01)
+            await queue.close()
+        await runner.cleanup()
+
+        assert [len(payload["embeds"]) for payload in stub.payloads] == [10, 2]
+        assert stub.payloads[0]["content"].split("\n") == [f"Tweet {i}" for i in range(10)]
+
+    loop.run_until_complete(run())
+
+
+def test_rate_limits_wait_for_retry_after(loop, database):
+    async def run():
+        stub = WebhookStub([web.Response(status=429, headers={"Retry-After": "0.3"})])
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            queue = WebhookQueue(session, database, url, base_delay=0.01)
+            queue.start()
+            await queue.enqueue(tweet(1))
+            await wait_for_payloads(stub, 1)
+            await queue.close()
+        await runner.cleanup()
+
+        assert stub.times[1] - stub.times[0] >= 0.3
+        assert stub.payloads[0]["embeds"] == [{"description": "Tweet 1"}]
+
+    loop.run_until_complete(run())
+
+
+def test_server_errors_are_retried_then_dropped(loop, database):
+    async def run():
+        stub = WebhookStub([web.Response(status=503) for _ in range(3)])
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            queue = WebhookQueue(session, database, url, max_attempts=3, base_delay=0.01)
+            queue.start()
+            await queue.enqueue(tweet(1))
+            async with asyncio.timeout(2):
+                while len(stub.times) < 3 or await database.get_next_webhook_attempt() is not None:
+                    await asyncio.sleep(0.01)
+            await queue.close()
+        await runner.cleanup()
+
+        assert len(stub.times) == 3
+        assert not stub.payloads
+
+    loop.run_until_complete(run())
+
+
+def test_queue_survives_a_restart(loop, database):
+    async def run():
+        stub = WebhookStub()
+        runner, url = await stub.start()
+        async with aiohttp.ClientSession() as session:
+            await WebhookQueue(session, database, url).enqueue(tweet(1))
+            queue = WebhookQueue(session, database, url)
+            queue.start()
+            await wait_for_payloads(stub, 1)
+            await queue.close()
+        await runner.cleanup()
+
+        assert stub.payloads[0]["content"] == "Tweet 1"
+
+    loop.run_until_complete(run())